@@ -0,0 +1,76 @@
+"""
+Ledger of the alerts already sent, so re-running a mailer never mails a job twice.
+
+    data/alerts/ledger.db
+
+`sent` has one row per (mailer, recipient, Job ID) that went out, and `marks` the newest drill file
+(job store snapshot name in the search index) each mailer has evaluated: its high-water mark.
+Jobs are only re-indexed when they are drilled again (new or changed), so the jobs from the mark's
+source onwards are all a mailer has to look at; the ledger drops the ones it has already sent.
+
+    ledger = open_ledger()
+    mark = high_water_mark(ledger, 'daily-mailer')
+    matches = unsent(ledger, 'daily-mailer', matches)
+    record_sent(ledger, 'daily-mailer', recipient, job_ids)
+    set_high_water_mark(ledger, 'daily-mailer', latest_source())
+
+The ledger holds recipients' addresses, so it is kept in the workflow cache rather than committed.
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+LEDGER_DB = os.path.join('data', 'alerts', 'ledger.db')
+RETENTION_DAYS = int(os.getenv("ALERT_LEDGER_RETENTION_DAYS", 180))  # Jobs close long before this
+
+def open_ledger(path=LEDGER_DB):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sent (
+            mailer TEXT, recipient TEXT, "Job ID" TEXT, "Sent At" TEXT,
+            PRIMARY KEY (mailer, recipient, "Job ID")
+        );
+        CREATE TABLE IF NOT EXISTS marks (mailer TEXT PRIMARY KEY, source TEXT, "Updated At" TEXT);
+    """)
+    return conn
+
+def high_water_mark(conn, mailer):
+    """
+    Returns the newest source the mailer has evaluated, or None before its first run.
+    """
+    row = conn.execute('SELECT source FROM marks WHERE mailer = ?', (mailer,)).fetchone()
+    return row[0] if row else None
+
+def set_high_water_mark(conn, mailer, source):
+    with conn:
+        conn.execute('INSERT OR REPLACE INTO marks (mailer, source, "Updated At") VALUES (?, ?, ?)',
+                     (mailer, source, datetime.now().isoformat(timespec='seconds')))
+
+def unsent(conn, mailer, matches):
+    """
+    Drops the jobs already sent to each recipient from {recipient: {keyword: [Job ID, ...]}}
+    (as returned by alerts.match_subscriptions), along with recipients left without any.
+    """
+    remaining = {}
+    for recipient, by_keyword in matches.items():
+        sent = {job_id for (job_id,) in conn.execute('SELECT "Job ID" FROM sent WHERE mailer = ? AND recipient = ?', (mailer, recipient))}
+        by_keyword = {k: [job_id for job_id in job_ids if job_id not in sent] for k, job_ids in by_keyword.items()}
+        by_keyword = {k: job_ids for k, job_ids in by_keyword.items() if job_ids}
+        if by_keyword:
+            remaining[recipient] = by_keyword
+    return remaining
+
+def record_sent(conn, mailer, recipient, job_ids):
+    now = datetime.now().isoformat(timespec='seconds')
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO sent (mailer, recipient, "Job ID", "Sent At") VALUES (?, ?, ?, ?)',
+                         [(mailer, recipient, str(job_id), now) for job_id in job_ids])
+
+def prune(conn, days=RETENTION_DAYS):
+    """
+    Forgets alerts older than days, keeping the ledger from growing with the archive.
+    """
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat(timespec='seconds')
+    with conn:
+        return conn.execute('DELETE FROM sent WHERE "Sent At" < ?', (cutoff,)).rowcount
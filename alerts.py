@@ -0,0 +1,168 @@
+"""
+Email alert subscriptions: which jobs each recipient hears about, and the email they get.
+
+A subscription is a recipient, a list of keywords and a salary cutoff. KeywordMatcher looks for the
+keywords of every subscription at once, so each job description is matched once no matter how many
+recipients share a keyword; match_subscriptions() turns the matches into
+{recipient: {keyword: [Job ID, ...]}}, and digest_message() into one email per recipient listing
+each job once, tagged with the keywords it matched.
+
+Subscriptions come from the JSON file named by ALERT_SUBSCRIPTIONS:
+
+    [{"recipient": "me@example.com", "keywords": ["python", "dashboard"], "min_salary": 90000}, ...]
+
+or, without it, a single subscription for RECEIVER_EMAIL with DEFAULT_KEYWORDS and SALARY_CUTOFF.
+"""
+import json
+import os
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+DEFAULT_KEYWORDS = ['analytic', 'research', 'business intelligence', 'python', 'dashboard', 'machine learning', 'artificial intelligence']
+COLOR_PALETTE = ["#FFDDC1", "#CFE2F3", "#D9EAD3", "#F9CB9C", "#D9BFD8", "#F6B5A0"]
+
+def load_subscriptions():
+    path = os.getenv("ALERT_SUBSCRIPTIONS")
+    if path:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return [{'recipient': os.getenv("RECEIVER_EMAIL"), 'keywords': DEFAULT_KEYWORDS, 'min_salary': float(os.getenv("SALARY_CUTOFF"))}]
+
+class KeywordMatcher:
+    """
+    Finds which of a set of keywords occur in a text (case-insensitive substrings, like
+    str.contains(keyword, case=False)), lower-casing the text once for all of them.
+
+    Keywords are tried longest first, and a keyword found implies every keyword it contains
+    ('analytics' implies 'analytic'), so those are never searched for separately. Plain substring
+    search is much faster than a combined regex in CPython, whose regex engine steps through the
+    text one character at a time.
+    """
+    def __init__(self, keywords):
+        self.keywords = sorted({k.lower() for k in keywords}, key=len, reverse=True)
+        # Keywords found in each keyword, e.g. 'analytics' implies 'analytic'
+        self.implied = {k: {other for other in self.keywords if other in k} for k in self.keywords}
+
+    def find(self, text):
+        """
+        Returns the set of keywords (lower-cased) that occur in text.
+        """
+        found = set()
+        if not isinstance(text, str):
+            return found
+        text = text.lower()
+        for keyword in self.keywords:
+            if keyword not in found and keyword in text:
+                found |= self.implied[keyword]
+        return found
+
+def match_subscriptions(jobs, subscriptions, column='Job Description'):
+    """
+    Matches every job against every subscription, looking at each job once.
+    Returns {recipient: {keyword: [Job ID, ...]}}, keywords in subscription order, jobs in frame order.
+    """
+    matcher = KeywordMatcher([k for s in subscriptions for k in s['keywords']])
+    found = [matcher.find(text) for text in jobs[column].tolist()]
+    salaries = jobs['Adjusted Minimum Salary'].tolist()
+    job_ids = jobs['Job ID'].tolist()
+
+    matches = {}
+    for subscription in subscriptions:
+        wanted = {k.lower(): k for k in subscription['keywords']}
+        cutoff = subscription.get('min_salary')
+        by_keyword = {k: [] for k in subscription['keywords']}
+        for job_id, keywords, salary in zip(job_ids, found, salaries):
+            if cutoff is not None and not salary >= cutoff:  # Missing salaries never pass a cutoff
+                continue
+            for keyword in keywords & wanted.keys():
+                by_keyword[wanted[keyword]].append(job_id)
+        matches[subscription['recipient']] = {k: ids for k, ids in by_keyword.items() if ids}
+    return matches
+
+def digest(matches, jobs):
+    """
+    Folds one recipient's {keyword: [Job ID, ...]} into {Job ID: [keyword, ...]}, each job once, in the order of jobs.
+    """
+    keywords = {}
+    for keyword, job_ids in matches.items():
+        for job_id in job_ids:
+            keywords.setdefault(job_id, []).append(keyword)
+    return {job_id: keywords[job_id] for job_id in jobs.index if job_id in keywords}
+
+def render_job_email(job_ids, jobs, back_to_top=True, keywords=None):
+    """
+    Renders the HTML email for the given Job IDs; jobs is indexed by Job ID.
+    keywords optionally maps Job IDs to the keywords they matched, shown with each job.
+    """
+    toc = []
+    details = []
+    for index, job_id in enumerate(job_ids):
+        job = jobs.loc[job_id]
+        toc.append(f'<li><a href="https://www.gojobs.gov.on.ca/employees/Preview.aspx?JobID={job_id}">{job["Job Title"]}</a></li>')
+        color = COLOR_PALETTE[index % len(COLOR_PALETTE)]
+        matched = f"\n                    <p><strong>Matched Keywords:</strong> {', '.join(keywords[job_id])}</p>" if keywords else ''
+        links = f'<a href="https://www.gojobs.gov.on.ca/employees/Preview.aspx?JobID={job["Job ID"]}">Job Description</a> | <a href="https://www.gojobs.gov.on.ca/employees/PDR.aspx?JobID={job["Job ID"]}">Job Specification</a>'
+        if back_to_top:
+            links += ' | <a href="#top">Back to Top</a>'
+        details.append(f"""
+                <div class="job" style="background-color: {color};">
+                    <p><strong>Closing Date:</strong> {job['Closing Date']}</p>{matched}
+                    <p><strong>Job Title:</strong> {job['Job Title']}</p>
+                    <p><strong>Job ID:</strong> {job['Job ID']}</p>
+                    <p><strong>Salary:</strong> ${job['Adjusted Minimum Salary']:,.2f} - ${job['Adjusted Maximum Salary']:,.2f}</p>
+                    <p><strong>Compensation Group:</strong> {job['Compensation Group']}</p>
+                    <p><strong>Job Term:</strong> {job['Job Term']}</p>
+                    <p><strong>Job Code:</strong> {job['Job Code']}</p>
+                    <p><strong>Category:</strong> {job['Category']}</p>
+                    <p><strong>Location:</strong> {job['Location']}</p>
+                    <p><strong>Organization:</strong> {job['Organization']}</p>
+                    <p><strong>Division:</strong> {job['Division']}</p>
+                    <p><strong>Address:</strong> {job['Address']}</p>
+                    <p>{links}</p>
+                    <hr>
+                </div>
+            """)
+
+    return f"""
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; background-color: #f4f4f4; }}
+            h2 {{ color: #333; }}
+            p {{ margin: 10px 0; padding: 10px; background-color: #fff; border-radius: 5px; box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1); }}
+            strong {{ color: #0056b3; }}
+            footer {{ margin-top: 20px; font-size: small; color: gray; text-align: center; }}
+            .container {{ max-width: 800px; margin: auto; background: #fff; border-radius: 10px; padding: 20px; box-shadow: 0 4px 10px rgba(0, 0, 0, 0.1); }}
+            .job {{ margin-bottom: 20px; border-radius: 5px; padding: 15px; }}
+            .job a {{ text-decoration: none; color: #0056b3; }}
+        </style>
+    </head>
+    <body>
+        <div class="container" id="top">
+            <div class="toc">
+                <h3>Jobs Postings</h3>
+                <ul>
+    {''.join(toc)}
+                </ul>
+            </div>
+    {''.join(details)}
+            </div>
+            <footer>
+                <p>These job opportunities are brought to you by Ontario Tax Payers ☺</p>
+            </footer>
+        </div>
+    </body>
+    </html>
+    """
+
+def digest_message(recipient, matches, jobs, subject, back_to_top=True):
+    """
+    Builds the digest email of one recipient's matches, e.g. subject 'OPS jobs closing this week'.
+    The keywords that matched are appended to the subject.
+    """
+    keywords = digest(matches, jobs)
+    msg = MIMEMultipart()
+    msg['To'] = recipient
+    msg['Subject'] = f"{subject}: {', '.join(matches)}"
+    msg.attach(MIMEText(render_job_email(list(keywords), jobs, back_to_top, keywords), 'html'))
+    return msg
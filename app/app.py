@@ -1,135 +1,74 @@
+import os
+import sys
+from io import BytesIO
 import pandas as pd
 import streamlit as st
-import requests
 import matplotlib.pyplot as plt
 import pytz
 from datetime import datetime
-import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared modules live in the repository root
+from data_sources import open_source
+from job_index import count_jobs, index_version, search_jobs, sync_index
 
 # Set page configuration to wide mode
 st.set_page_config(layout="wide")
 
-# Function to get CSV filenames dynamically from GitHub using API
-@st.cache_data(ttl=3600)  # Cache for 1 hour to reduce frequent API calls
-def get_csv_filenames():
-    url = "https://api.github.com/repos/pspon/ops-scraper/contents/data/jobs"
-    response = requests.get(url)
-    if response.status_code != 200:
-        st.warning("Failed to load GitHub directory.")
-        return []
-
-    files = response.json()
-    csv_files = [file['download_url'] for file in files if file['name'].endswith('scraped_jobs.csv')]
-    return csv_files
+# Function to load drilled files the search index has not seen yet
+@st.cache_data(ttl=3600)  # Check GitHub for new files at most once an hour
+def sync_data():
+    return sync_index(open_source(os.getenv("JOB_DATA_SOURCE", "github")).drill_files())
 
-# Function to download and merge CSV files with cache handling for new files
-@st.cache_data
-def load_data():
-    csv_files = get_csv_filenames()
+sync_data()
 
-    # Check for new files by comparing with cached filenames
-    try:
-        cached_files = st.session_state.get('cached_csv_files', [])
-        if cached_files != csv_files:
-            st.session_state.cached_csv_files = csv_files  # Update cache
-            st.session_state.data_loaded = False  # Flag to reload data
-    except KeyError:
-        st.session_state.cached_csv_files = csv_files  # Initialize if not set
-        st.session_state.data_loaded = False
+# Number of jobs shown per page of the job browser
+PAGE_SIZE = 25
 
-    # Load data only if it's not already loaded
-    if not st.session_state.get('data_loaded', False):
-        all_data = []
+# Filters the chart counts can be answered with from the job_counts cube
+CUBE_FILTERS = ['Organization', 'Category']
 
-        for url in csv_files:
-            response = requests.get(url)
-            if response.status_code == 200:
-                df = pd.read_csv(url)
-                all_data.append(df)
-            else:
-                st.warning(f"Failed to load {url}")
+# Function to count jobs per chart dimension from the aggregate cube, cached per filter set and index version
+@st.cache_data
+def cube_counts(cube_filters, today, closing_on, version):
+    filters = dict(cube_filters)
+    jobs_per_day = count_jobs('Closing Date', closing_after=today, closing_on=closing_on, text_filters=filters)
+    jobs_per_day.index = pd.to_datetime(jobs_per_day.index).date
+    jobs_per_org = count_jobs('Organization', closing_after=today, closing_on=closing_on, text_filters=filters)
+    jobs_per_week_of_year = count_jobs('Closing Week', closing_after=today, closing_on=closing_on, text_filters=filters)
+    return jobs_per_day, jobs_per_org, jobs_per_week_of_year
+
+# Function to render a bar chart as PNG, cached on the counts it shows
+@st.cache_data
+def render_bar_chart(counts, title, xlabel, ylabel, kind='bar'):
+    fig, ax = plt.subplots()
+    if not counts.empty:  # Plotting nothing fails, an empty chart is drawn instead
+        counts.plot(kind=kind, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if kind == 'bar':
+        ax.tick_params(axis='x', labelrotation=90)
+    image = BytesIO()
+    fig.savefig(image, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return image.getvalue()
+
+# Function to run an index search, cached per filter set and index version
+@st.cache_data
+def cached_search(text_filters, today, closing_on, posted_on, version):
+    return search_jobs(dict(text_filters), closing_after=today, closing_on=closing_on, posted_on=posted_on)
 
-        if all_data:
-            combined_data = pd.concat(all_data, ignore_index=True)
-            combined_data = combined_data.drop_duplicates(subset='Job ID').reset_index(drop=True)
-            st.session_state.data_loaded = True  # Set flag to true after loading
-            return combined_data
-        else:
-            st.warning("No data available to display.")
-            return pd.DataFrame()
-    else:
-        return pd.DataFrame()  # Return empty DataFrame if already loaded
+# Get today's date in Eastern Time
+eastern = pytz.timezone('US/Eastern')
+today = datetime.now(eastern).date()
 
-# Load the data
-data = load_data()
+# Jobs that are still open
+data = cached_search((), today, None, None, index_version())
 
 # Process data
 if not data.empty:
-    
-    # Clean and convert relevant columns
-    data['Posted on'] = pd.to_datetime(data['Posted on'].str.replace(r'(?i)(pm).*', '', regex=True), errors='coerce')
-    data['Closing Date'] = pd.to_datetime(data['Closing Date'].str.replace(r'(?i)(pm).*', '', regex=True), errors='coerce')
-    data['Closing Week'] = data['Closing Date'].dt.isocalendar().apply(lambda x: f"{x['year']}-{x['week']:02}", axis=1)
     data['Count'] = 1  # For counting
 
-    # Convert 'Job ID' to string type
-    data['Job ID'] = data['Job ID'].astype(str)
-    
-    # Get today's date in Eastern Time
-    eastern = pytz.timezone('US/Eastern')
-    today = pd.Timestamp(datetime.now(eastern).date())  # Convert to Timestamp for comparison
-    
-    # Filter for rows after today's date
-    data = data[data['Closing Date'] > today]
-
-    # Regex patterns to extract salaries and pay frequency
-    salary_pattern = r'\$([\d,]+\.\d{2})  - \$([\d,]+\.\d{2})'
-    frequency_pattern = r'Per (Year|Week|Hour)'
-    
-    # Extract Minimum and Maximum Salaries
-    salary_matches = data['Salary'].str.extract(salary_pattern)
-    data['Minimum Salary'] = salary_matches[0].str.replace(',', '').astype(float)
-    data['Maximum Salary'] = salary_matches[1].str.replace(',', '').astype(float)
-    
-    # Extract Pay Frequency
-    data['Pay Frequency'] = data['Salary'].str.extract(frequency_pattern)
-    
-    # Adjust Minimum and Maximum Salary to yearly values
-    data['Adjusted Minimum Salary'] = np.where(
-        data['Pay Frequency'] == 'Hour',
-        data['Minimum Salary'] * 36.25 * 52,  # Convert hourly to yearly
-        np.where(
-            data['Pay Frequency'] == 'Week',
-            data['Minimum Salary'] * 52,  # Convert weekly to yearly
-            data['Minimum Salary']  # Already yearly
-        )
-    )
-    
-    data['Adjusted Maximum Salary'] = np.where(
-        data['Pay Frequency'] == 'Hour',
-        data['Maximum Salary'] * 36.25 * 52,  # Convert hourly to yearly
-        np.where(
-            data['Pay Frequency'] == 'Week',
-            data['Maximum Salary'] * 52,  # Convert weekly to yearly
-            data['Maximum Salary']  # Already yearly
-        )
-    )
-    
-    # Format the Adjusted Salary Range
-    data['Adjusted Salary Range'] = data.apply(
-        lambda row: f"${row['Adjusted Minimum Salary']:.2f} - ${row['Adjusted Maximum Salary']:.2f}"
-        if pd.notna(row['Adjusted Minimum Salary']) and pd.notna(row['Adjusted Maximum Salary'])
-        else np.nan,
-        axis=1
-    )
-    
-    #data = data.fillna("", inplace=True)
-    # Convert date columns to datetime format
-    #data['Closing Date'] = pd.to_datetime(data['Closing Date'], errors='coerce')
-    #data['Posted on'] = pd.to_datetime(data['Posted on'], errors='coerce')
-    
-
-
     # Streamlit App
     st.title("Job Data Visualization and Interactive DataFrame")
     
@@ -166,64 +105,36 @@ if not data.empty:
     skills_filter = st.sidebar.text_input("Skills")
     freedom_of_action_filter = st.sidebar.text_input("Freedom of Action")
 
-    # Filter the DataFrame based on user inputs
-    filtered_data = data.copy()
-        
-    # Apply filters
-    if job_id_filter:
-        filtered_data = filtered_data[filtered_data['Job ID'].str.contains(job_id_filter, case=False)]
-    if job_title_filter:
-        filtered_data = filtered_data[filtered_data['Job Title'].str.contains(job_title_filter, case=False)]
-    if organization_filter:
-        filtered_data = filtered_data[filtered_data['Organization'].str.contains(organization_filter, case=False)]
-    if salary_filter:
-        filtered_data = filtered_data[filtered_data['Salary'].str.contains(salary_filter, case=False)]
-    if location_filter:
-        filtered_data = filtered_data[filtered_data['Location'].str.contains(location_filter, case=False)]
-    if closing_date_filter:
-        filtered_data = filtered_data[filtered_data['Closing Date'] == pd.to_datetime(closing_date_filter)]
-        #filtered_data = filtered_data[filtered_data['Closing Date'].str.contains(closing_date_filter, case=False)]
-    if position_title_filter:
-        filtered_data = filtered_data[filtered_data['Position Title'].str.contains(position_title_filter, case=False)]
-    if job_description_filter:
-        filtered_data = filtered_data[filtered_data['Job Description'].str.contains(job_description_filter, case=False)]
-    if division_filter:
-        filtered_data = filtered_data[filtered_data['Division'].str.contains(division_filter, case=False)]
-    if city_filter:
-        filtered_data = filtered_data[filtered_data['City'].str.contains(city_filter, case=False)]
-    if language_filter:
-        filtered_data = filtered_data[filtered_data['Language of Position(s)'].str.contains(language_filter, case=False)]
-    if job_term_filter:
-        filtered_data = filtered_data[filtered_data['Job Term'].str.contains(job_term_filter, case=False)]
-    if job_code_filter:
-        filtered_data = filtered_data[filtered_data['Job Code'].str.contains(job_code_filter, case=False)]
-    if posting_status_filter:
-        filtered_data = filtered_data[filtered_data['Posting Status'].str.contains(posting_status_filter, case=False)]
-    if address_filter:
-        filtered_data = filtered_data[filtered_data['Address'].str.contains(address_filter, case=False)]
-    if compensation_group_filter:
-        filtered_data = filtered_data[filtered_data['Compensation Group'].str.contains(compensation_group_filter, case=False)]
-    if schedule_filter:
-        filtered_data = filtered_data[filtered_data['Schedule'].astype(str).str.contains(schedule_filter)]
-    if category_filter:
-        filtered_data = filtered_data[filtered_data['Category'].str.contains(category_filter, case=False)]
-    if posted_on_filter:
-        filtered_data = filtered_data[filtered_data['Posted on'] == pd.to_datetime(posted_on_filter)]
-        #filtered_data = filtered_data[filtered_data['Posted on'].str.contains(posted_on_filter, case=False)]
-    if note_filter:
-        filtered_data = filtered_data[filtered_data['Note'].fillna('').str.contains(note_filter, case=False)]
-    if purpose_of_position_filter:
-        filtered_data = filtered_data[filtered_data['Purpose of Position'].fillna('').str.contains(purpose_of_position_filter, case=False)]
-    if duties_filter:
-        filtered_data = filtered_data[filtered_data['Duties and Responsibilities'].fillna('').str.contains(duties_filter, case=False)]
-    if staffing_filter:
-        filtered_data = filtered_data[filtered_data['Staffing & Licensing'].fillna('').str.contains(staffing_filter, case=False)]
-    if knowledge_filter:
-        filtered_data = filtered_data[filtered_data['Knowledge'].fillna('').str.contains(knowledge_filter, case=False)]
-    if skills_filter:
-        filtered_data = filtered_data[filtered_data['Skills'].fillna('').str.contains(skills_filter, case=False)]
-    if freedom_of_action_filter:
-        filtered_data = filtered_data[filtered_data['Freedom of Action'].fillna('').str.contains(freedom_of_action_filter, case=False)]
+    # Filter with index lookups instead of scanning every column
+    text_filters = {
+        'Job ID': job_id_filter,
+        'Job Title': job_title_filter,
+        'Organization': organization_filter,
+        'Salary': salary_filter,
+        'Location': location_filter,
+        'Position Title': position_title_filter,
+        'Job Description': job_description_filter,
+        'Division': division_filter,
+        'City': city_filter,
+        'Language of Position(s)': language_filter,
+        'Job Term': job_term_filter,
+        'Job Code': job_code_filter,
+        'Posting Status': posting_status_filter,
+        'Address': address_filter,
+        'Compensation Group': compensation_group_filter,
+        'Schedule': schedule_filter,
+        'Category': category_filter,
+        'Note': note_filter,
+        'Purpose of Position': purpose_of_position_filter,
+        'Duties and Responsibility': duties_filter,
+        'Staffing & Licensing': staffing_filter,
+        'Knowledge': knowledge_filter,
+        'Skills': skills_filter,
+        'Freedom of Action': freedom_of_action_filter,
+    }
+    active_filters = tuple((column, text) for column, text in text_filters.items() if text)
+    filtered_data = cached_search(active_filters, today, closing_date_filter, posted_on_filter, index_version())
+    filtered_data['Count'] = 1
 
     # Display raw data
     with st.expander(f"Show Raw Data"):
@@ -236,75 +147,64 @@ if not data.empty:
     # Add content to the first column
     with col1:
 
-        # Visualization: Jobs per closing date
-        jobs_per_day = filtered_data.groupby(data['Closing Date'].dt.date).size()
-        
+        # Jobs per closing date, organization and closing week
+        if all(column in CUBE_FILTERS for column, _ in active_filters) and posted_on_filter is None:
+            jobs_per_day, jobs_per_org, jobs_per_week_of_year = cube_counts(active_filters, today, closing_date_filter, index_version())
+        else:
+            jobs_per_day = filtered_data.groupby(filtered_data['Closing Date'].dt.date).size()
+            jobs_per_org = filtered_data.groupby('Organization').size()
+            jobs_per_week_of_year = filtered_data.groupby('Closing Week').size()
+
         # Number of Job Postings by Closing Date
         st.subheader('Number of Job Postings by Closing Date')
-        fig, ax = plt.subplots()
-        jobs_per_day.plot(kind='bar', ax=ax)
-        ax.set_title('Number of Job Postings by Closing Date')
-        ax.set_xlabel('Closing Date')
-        ax.set_ylabel('Number of Job Postings')
-        plt.xticks(rotation=90)
-        st.pyplot(fig)
-    
+        st.image(render_bar_chart(jobs_per_day, 'Number of Job Postings by Closing Date', 'Closing Date', 'Number of Job Postings'))
+
         # Number of Job Postings by Organization
-        jobs_per_org = filtered_data.groupby('Organization').size().sort_values(ascending=True)
-    
         st.subheader('Number of Job Postings by Organization')
-        fig, ax = plt.subplots()
-        jobs_per_org.plot(kind='barh', ax=ax)
-        ax.set_title('Number of Job Postings by Organization')
-        ax.set_xlabel('Number of Job Postings')
-        ax.set_ylabel('Organization')
-        st.pyplot(fig)
-    
+        st.image(render_bar_chart(jobs_per_org.sort_values(ascending=True), 'Number of Job Postings by Organization', 'Number of Job Postings', 'Organization', kind='barh'))
+
         # Number of Job Postings by Closing Week of Year
-        jobs_per_week_of_year = filtered_data.groupby('Closing Week').size()
-    
         st.subheader('Number of Job Postings by Closing Week of Year')
-        fig, ax = plt.subplots()
-        jobs_per_week_of_year.plot(kind='bar', ax=ax)
-        ax.set_title('Number of Job Postings by Closing Week of Year')
-        ax.set_xlabel('Closing Week of Year')
-        ax.set_ylabel('Number of Job Postings')
-        plt.xticks(rotation=90)
-        st.pyplot(fig)
+        st.image(render_bar_chart(jobs_per_week_of_year, 'Number of Job Postings by Closing Week of Year', 'Closing Week of Year', 'Number of Job Postings'))
 
     # Add content to the second column
     with col2:
         # Display the interactive DataFrame
         st.subheader("Interactive Job Postings")        
             
-        # Use a multiselect to choose job postings
+        # Page through the filtered jobs; details are only rendered for the jobs on the current page
         if not filtered_data.empty:
-            job_titles = filtered_data['Job Title'].tolist()
+            jobs_by_id = filtered_data.set_index('Job ID', drop=False)  # Job ID -> row
+            page_count = (len(jobs_by_id) - 1) // PAGE_SIZE + 1
+            page = st.number_input(f"Page (of {page_count}, {len(jobs_by_id)} postings)", min_value=1, max_value=page_count, value=1,
+                                   key=f"page-{active_filters}-{closing_date_filter}-{posted_on_filter}")  # Back to page 1 when the filters change
+            page_ids = jobs_by_id.index[(page - 1) * PAGE_SIZE:page * PAGE_SIZE].tolist()
             with st.expander(f"Selected Job Postings"):
-                selected_job_titles = st.multiselect("Select Job Postings", job_titles, default = job_titles)
-    
-            # Display details for each selected job in tabs
-            if selected_job_titles:
-                for job_title in selected_job_titles:
-                    selected_job = filtered_data[filtered_data['Job Title'] == job_title].iloc[0]
-                    with st.expander(f"↪   {selected_job['Job Title']}"):
-                        st.write("### Job Details")
-                        st.write(f"**Job Title:** {selected_job['Job Title']}")
-                        st.write(f"**Job ID:** {selected_job['Job ID']}")
-                        st.write(f"**Position Title:** {selected_job['Position Title']}")
-                        st.write(f"**Closing Date:** {selected_job['Closing Date']}")
-                        st.write(f"**Posting Status:** {selected_job['Posting Status']}")
-                        st.write(f"**Posted on:** {selected_job['Posted on']}")
-                        st.write(f"**Salary:** \${selected_job['Adjusted Minimum Salary']:,.2f} - \${selected_job['Adjusted Maximum Salary']:,.2f}")
-                        st.write(f"**Job Term:** {selected_job['Job Term']}")
-                        st.write(f"**Job Code:** {selected_job['Job Code']}")
-                        st.write(f"**Category:** {selected_job['Category']}")
-                        st.write(f"**Compensation Group:** {selected_job['Compensation Group']}")
-                        st.write(f"**Organization:** {selected_job['Organization']}")
-                        st.write(f"**Division:** {selected_job['Division']}")
-                        st.write(f"**Location:** {selected_job['Location']}")
-                        st.write(f"**Address:** {selected_job['Address']}")
-                        st.write(f"**Purpose of Position:** {selected_job['Purpose of Position']}")
-                        st.write(f"**Job Description:** {selected_job['Job Description']}")
-                        st.write("---")
-
+                selected_job_ids = st.multiselect("Select Job Postings", page_ids, default=page_ids,
+                                                  format_func=lambda job_id: f"{jobs_by_id.at[job_id, 'Job Title']} ({job_id})")
+
+            # Display details for each selected job
+            for job_id in selected_job_ids:
+                selected_job = jobs_by_id.loc[job_id]
+                with st.expander(f"↪   {selected_job['Job Title']}"):
+                    st.markdown("\n\n".join([
+                        "### Job Details",
+                        f"**Job Title:** {selected_job['Job Title']}",
+                        f"**Job ID:** {selected_job['Job ID']}",
+                        f"**Position Title:** {selected_job['Position Title']}",
+                        f"**Closing Date:** {selected_job['Closing Date']}",
+                        f"**Posting Status:** {selected_job['Posting Status']}",
+                        f"**Posted on:** {selected_job['Posted on']}",
+                        f"**Salary:** \\${selected_job['Adjusted Minimum Salary']:,.2f} - \\${selected_job['Adjusted Maximum Salary']:,.2f}",
+                        f"**Job Term:** {selected_job['Job Term']}",
+                        f"**Job Code:** {selected_job['Job Code']}",
+                        f"**Category:** {selected_job['Category']}",
+                        f"**Compensation Group:** {selected_job['Compensation Group']}",
+                        f"**Organization:** {selected_job['Organization']}",
+                        f"**Division:** {selected_job['Division']}",
+                        f"**Location:** {selected_job['Location']}",
+                        f"**Address:** {selected_job['Address']}",
+                        f"**Purpose of Position:** {selected_job['Purpose of Position']}",
+                        f"**Job Description:** {selected_job['Job Description']}",
+                        "---",
+                    ]))
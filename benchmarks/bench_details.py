@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of the Preview.aspx / PDR.aspx extractors against the previous BeautifulSoup
+implementation (17 full-tree find(string=...) searches and six find_all('h2') calls), over the
+HTML fixtures. Run from the repository root:
+
+    python benchmarks/bench_details.py [--jobs 400] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+from glob import glob
+from time import perf_counter
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from parsers import parse_job_description, parse_job_posting
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def parse_job_posting_bs4(posting_html):
+    posting_soup = BeautifulSoup(posting_html, 'html.parser')
+    details = {}
+    details['Position Title'] = posting_soup.find('h1').get_text(strip=True)
+    details['Job Description'] = posting_soup.find('div', class_='row JobAdSpace').get_text(separator="\n", strip=True)
+    for label in ["Organization", "Division", "City", "Language of Position(s)", "Job Term", "Job Code", "Salary",
+                  "Posting Status", "Job ID", "Address", "Compensation Group", "Schedule", "Category", "Posted on"]:
+        details[label] = posting_soup.find(string=f"{label}:").find_next().text.strip()
+    details['Note'] = posting_soup.find(string="Note:").find_next().text.strip() if posting_soup.find(string="Note:") else ""
+    return details
+
+def parse_job_description_bs4(description_html, details):
+    description_soup = BeautifulSoup(description_html, 'html.parser')
+    for i, section in enumerate(['Purpose of Position', 'Duties and Responsibility', 'Staffing & Licensing', 'Knowledge', 'Skills', 'Freedom of Action']):
+        details[section] = description_soup.find_all('h2')[i].find_next('p').text.strip()
+    return details
+
+def time_jobs(parse_posting, parse_description, jobs, repeat):
+    """
+    Best-of-repeat time to parse both pages of every job.
+    """
+    best = None
+    for _ in range(repeat):
+        started = perf_counter()
+        for posting_html, description_html in jobs:
+            parse_description(description_html, parse_posting(posting_html))
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="Directory of preview_<id>.html / pdr_<id>.html pages")
+    parser.add_argument('--jobs', type=int, default=400, help="Jobs per simulated drill (fixtures are cycled)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    fixtures = []
+    for preview in sorted(glob(os.path.join(args.fixtures, 'preview_*.html'))):
+        pdr = preview.replace('preview_', 'pdr_')
+        if os.path.exists(pdr):
+            fixtures.append((open(preview, encoding='utf-8').read(), open(pdr, encoding='utf-8').read()))
+    if not fixtures:
+        sys.exit(f"No preview/pdr fixtures in {args.fixtures}; run benchmarks/render_fixtures.py first.")
+    jobs = [fixtures[i % len(fixtures)] for i in range(args.jobs)]
+
+    # Both extractors must agree before their speed means anything
+    for posting_html, description_html in fixtures:
+        expected = parse_job_description_bs4(description_html, parse_job_posting_bs4(posting_html))
+        assert parse_job_description(description_html, parse_job_posting(posting_html)) == expected, "Extractors disagree on a fixture job"
+
+    baseline = time_jobs(parse_job_posting_bs4, parse_job_description_bs4, jobs, args.repeat)
+    fast = time_jobs(parse_job_posting, parse_job_description, jobs, args.repeat)
+    print(f"{args.jobs} jobs ({len(fixtures)} fixture pairs)")
+    print(f"  bs4 find(string=...) per field: {baseline * 1000:8.1f} ms  ({baseline / args.jobs * 1000:.2f} ms/job)")
+    print(f"  lxml single pass:               {fast * 1000:8.1f} ms  ({fast / args.jobs * 1000:.2f} ms/job)")
+    print(f"  speedup: {baseline / fast:.1f}x")
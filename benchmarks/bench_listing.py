@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of the listing page extractor against the previous BeautifulSoup + per-<tr> DataFrame
+implementation, over the HTML fixtures. Run from the repository root:
+
+    python benchmarks/bench_listing.py [--pages 40] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+from glob import glob
+from time import perf_counter
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from parsers import parse_listing_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def parse_listing_page_bs4(html):
+    """
+    The extractor scraper.py used before: html.parser soup, one DataFrame per <tr>, then concat and join.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    links = soup.find_all('a', target='_self')
+    ids = [a['href'].split('JobID=')[1] for a in links if 'JobID=' in a['href']]
+    texts = [link.text.strip() for link in links]
+    df_ID_TITLE = pd.DataFrame({'Job ID': ids, 'Job Title': texts})
+    dfs = []
+    for tr in soup.find_all('tr'):
+        fields = [div.text.strip().replace(':','') for div in tr.find_all('div',class_="col-sm-3 col-form-label")]
+        values = [div.text.strip() for div in tr.find_all('div',class_="col-sm-9 JobAdAlignRight")]
+        dfs.append(pd.DataFrame([values], columns=fields))
+    dfs = pd.concat(dfs).reset_index(drop=True)
+    return df_ID_TITLE.drop_duplicates(subset='Job ID').reset_index(drop=True).join(dfs)
+
+def time_crawl(parse, pages, repeat):
+    """
+    Best-of-repeat time to parse the given pages, as the parse phase of one crawl.
+    """
+    best = None
+    for _ in range(repeat):
+        started = perf_counter()
+        for html in pages:
+            parse(html)
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="Directory of listing_*.html pages")
+    parser.add_argument('--pages', type=int, default=40, help="Pages per simulated crawl (fixtures are cycled)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    files = sorted(glob(os.path.join(args.fixtures, 'listing_*.html')))
+    if not files:
+        sys.exit(f"No listing fixtures in {args.fixtures}; run benchmarks/render_fixtures.py first.")
+    fixtures = [open(f, encoding='utf-8').read() for f in files]
+    pages = [fixtures[i % len(fixtures)] for i in range(args.pages)]
+
+    # Both extractors must agree before their speed means anything
+    for html in fixtures:
+        expected = parse_listing_page_bs4(html)
+        expected = [{k: v for k, v in row.items() if pd.notna(v)} for row in expected.to_dict('records')]
+        assert parse_listing_page(html) == expected, "Extractors disagree on a fixture page"
+
+    baseline = time_crawl(parse_listing_page_bs4, pages, args.repeat)
+    fast = time_crawl(parse_listing_page, pages, args.repeat)
+    print(f"{args.pages} pages ({len(fixtures)} fixtures, {sum(map(len, fixtures)) / len(fixtures) / 1024:.0f} KiB each)")
+    print(f"  bs4 + DataFrame per <tr>: {baseline * 1000:8.1f} ms  ({baseline / args.pages * 1000:.2f} ms/page)")
+    print(f"  lxml single pass:         {fast * 1000:8.1f} ms  ({fast / args.pages * 1000:.2f} ms/page)")
+    print(f"  speedup: {baseline / fast:.1f}x")
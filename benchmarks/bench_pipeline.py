@@ -0,0 +1,156 @@
+"""
+End-to-end benchmark of the pipeline against the local stand-in server (stand_in.py), in a scratch
+working directory so nothing under data/ is touched. Run from the repository root:
+
+    python benchmarks/bench_pipeline.py [--pages 10] [--latency 0.05] [--error-rate 0.02] [--json results.json]
+
+Stages and what their latency percentiles are taken over:
+
+    crawl       scraper.py (LISTING_MODE=http)   time from one results page to the next
+    drill       driller.py                       time from a job's first request to its last response, 429 retries included
+    normalize   normalize_jobs()                 one run over --rows drilled rows
+    match       alerts.match_subscriptions()     one run of --recipients subscriptions over those rows
+
+Peak memory is the maximum RSS of the script's process for crawl and drill, and the peak traced
+allocation for the in-process stages. The scripts read their usual settings (DRILL_CONCURRENCY,
+DRILL_RATE, DRILL_BACKEND, ...) from the environment; the response cache is off unless DRILL_CACHE_DIR is set.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from glob import glob
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+from alerts import DEFAULT_KEYWORDS, match_subscriptions
+from normalize import normalize_jobs
+from render_fixtures import DEFAULT_SOURCE
+from stand_in import StandIn
+
+def run_script(name, workdir, env):
+    """
+    Runs one of the pipeline scripts to completion. Returns (seconds, peak RSS in MiB).
+    """
+    log_path = os.path.join(workdir, f"{name}.log")
+    started = perf_counter()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, name)], cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = perf_counter() - started
+    if process.returncode != 0:
+        sys.exit(f"{name} exited with {process.returncode}, see {log_path}")
+    return elapsed, usage.ru_maxrss / 1024
+
+def time_in_process(run, repeat):
+    """
+    Times repeat calls of run(). Returns (list of seconds, peak traced MiB of one call).
+    """
+    times = []
+    for _ in range(repeat):
+        started = perf_counter()
+        run()
+        times.append(perf_counter() - started)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return times, peak / 1024 / 1024
+
+def crawl_latencies(requests):
+    """
+    Seconds between consecutive results pages, the first counted from the search page request.
+    """
+    search = [r for r in requests if r[0] == 'search']
+    pages = sorted(r[4] for r in requests if r[0] == 'listing' and r[2] == 200)
+    if not search or not pages:
+        return []
+    return list(np.diff([min(r[3] for r in search)] + pages))
+
+def drill_latencies(requests):
+    spans = {}
+    for kind, job_id, _, started, finished in requests:
+        if kind in ('posting', 'description'):
+            first, last = spans.get(job_id, (started, finished))
+            spans[job_id] = (min(first, started), max(last, finished))
+    return [last - first for first, last in spans.values()]
+
+def stage(name, items, unit, seconds, latencies, peak_mib, throttled=0):
+    return {
+        'stage': name, 'items': items, 'unit': unit, 'seconds': round(seconds, 3),
+        'throughput': round(items / seconds, 1) if seconds else None,
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 1) if len(latencies) else None,
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 1) if len(latencies) else None,
+        'peak_mib': round(peak_mib, 1), '429s': throttled,
+    }
+
+def print_table(results):
+    print(f"{'stage':<10} {'items':<12} {'seconds':>8} {'per s':>9} {'p50 ms':>9} {'p95 ms':>9} {'peak MiB':>9} {'429s':>5}")
+    for r in results:
+        print(f"{r['stage']:<10} {str(r['items']) + ' ' + r['unit']:<12} {r['seconds']:>8.2f} {r['throughput'] or 0:>9.1f} "
+              f"{r['p50_ms'] or 0:>9.1f} {r['p95_ms'] or 0:>9.1f} {r['peak_mib']:>9.1f} {r['429s']:>5}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help="Drilled CSV the stand-in serves jobs from")
+    parser.add_argument('--pages', type=int, default=10, help="Results pages served (10 jobs each)")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds the stand-in adds to every response")
+    parser.add_argument('--jitter', type=float, default=0.05, help="Up to this many more seconds, at random")
+    parser.add_argument('--error-rate', type=float, default=0.02, help="Share of requests answered with a 429")
+    parser.add_argument('--retry-after', type=int, default=None, help="Retry-After seconds sent with a 429")
+    parser.add_argument('--rows', type=int, default=20000, help="Rows for the normalize and match stages (drilled rows cycled)")
+    parser.add_argument('--recipients', type=int, default=5, help="Subscriptions (DEFAULT_KEYWORDS each) for the match stage")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs of the in-process stages")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the stand-in's jitter and 429s")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch directory (logs, outputs)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ops-bench-')
+    results = []
+    with StandIn(os.path.abspath(args.source), args.pages, args.latency, args.jitter, args.error_rate, args.retry_after, seed=args.seed) as server:
+        env = dict(os.environ, GOJOBS_URL=server.url, LISTING_MODE='http', PAGE_LIMIT=str(args.pages), SAVE_HTML='0', POSTING_TYPE='Open')
+        env.setdefault('DRILL_CACHE_DIR', '')
+        print(f"Stand-in serving {len(server.jobs)} jobs at {server.url}, scratch directory {workdir}")
+
+        seconds, peak = run_script('scraper.py', workdir, env)
+        crawl = [r for r in server.requests if r[0] in ('search', 'listing')]
+        results.append(stage('crawl', sum(1 for r in crawl if r[0] == 'listing' and r[2] == 200), 'pages', seconds,
+                             crawl_latencies(crawl), peak, sum(1 for r in crawl if r[2] == 429)))
+
+        seen = len(server.requests)
+        seconds, peak = run_script('driller.py', workdir, env)
+        drill = server.requests[seen:]
+        latencies = drill_latencies(drill)
+        results.append(stage('drill', len(latencies), 'jobs', seconds, latencies, peak, sum(1 for r in drill if r[2] == 429)))
+
+    drilled = pd.concat(pd.read_csv(path) for path in glob(os.path.join(workdir, 'data', 'jobs', '*_scraped_jobs.csv')))
+    rows = drilled.iloc[np.arange(args.rows) % len(drilled)].reset_index(drop=True)
+    times, peak = time_in_process(lambda: normalize_jobs(rows.copy()), args.repeat)
+    results.append(stage('normalize', args.rows, 'rows', float(np.median(times)), times, peak))
+
+    jobs = normalize_jobs(rows.copy())
+    jobs['Job ID'] = jobs.index.astype(str)
+    subscriptions = [{'recipient': f"recipient{i}@example.com", 'keywords': DEFAULT_KEYWORDS, 'min_salary': None} for i in range(args.recipients)]
+    times, peak = time_in_process(lambda: match_subscriptions(jobs, subscriptions), args.repeat)
+    results.append(stage('match', args.rows, 'jobs', float(np.median(times)), times, peak))
+
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Wrote {args.json}")
+    if args.keep:
+        print(f"Kept {workdir}")
+    else:
+        shutil.rmtree(workdir)
@@ -0,0 +1,145 @@
+"""
+Renders HTML fixtures in the markup of the gojobs.gov.on.ca employee pages from a drilled CSV,
+so the parsers can be benchmarked offline. Run from the repository root:
+
+    python benchmarks/render_fixtures.py [path/to/scraped_jobs.csv]
+
+Pages saved by the scraper (data/html/<folder>/*.html) can be dropped into benchmarks/fixtures
+instead to benchmark against real captures.
+"""
+import base64
+import hashlib
+import os
+import sys
+from html import escape
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DEFAULT_SOURCE = os.path.join('data', 'jobs', '20241219_15_scraped_jobs.csv')
+JOBS_PER_PAGE = 10
+LISTING_FIELDS = ['Organization', 'Salary', 'Location', 'Closing Date']
+POSTING_FIELDS = ['Organization', 'Division', 'City', 'Language of Position(s)', 'Job Term', 'Job Code', 'Salary',
+                  'Posting Status', 'Job ID', 'Address', 'Compensation Group', 'Schedule', 'Category', 'Posted on', 'Note']
+PDR_SECTIONS = ['Purpose of Position', 'Duties and Responsibilities', 'Staffing & Licensing Requirements',
+                'Knowledge', 'Skills', 'Freedom of Action']
+
+def viewstate(seed, size=24000):
+    """
+    Deterministic stand-in for the __VIEWSTATE blob, which dominates the size of a results page.
+    """
+    blob = b''
+    digest = seed.encode('utf-8')
+    while len(blob) < size:
+        digest = hashlib.sha256(digest).digest()
+        blob += digest
+    return base64.b64encode(blob[:size]).decode('ascii')
+
+def page_shell(title, body, state_seed):
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>{escape(title)}</title>
+<link rel="stylesheet" href="/employees/css/bootstrap.min.css"><script src="/employees/js/jquery.min.js"></script></head>
+<body>
+<header class="navbar"><ul class="nav"><li><a href="/employees/">Home</a></li><li><a href="/employees/Search.aspx">Search</a></li><li><a href="/employees/Help.aspx">Help</a></li></ul></header>
+<form method="post" action="./" id="aspnetForm">
+<div class="aspNetHidden">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate(state_seed)}" />
+<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="0A4C2F1B" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{viewstate(state_seed + 'ev', 2000)}" />
+</div>
+<main class="container">
+{body}
+</main>
+</form>
+<footer><p>&copy; King's Printer for Ontario</p><!-- footer --></footer>
+</body>
+</html>
+"""
+
+def listing_page_html(rows, page_no, total_pages, state_seed=None):
+    """
+    Renders one search results page: a grid row per job with its title link and listing fields.
+    """
+    grid = []
+    for _, row in rows.iterrows():
+        fields = ''.join(
+            f'<div class="row"><div class="col-sm-3 col-form-label">{field}:</div>'
+            f'<div class="col-sm-9 JobAdAlignRight">{escape(str(row[field]))}</div></div>'
+            for field in LISTING_FIELDS if pd.notna(row[field])
+        )
+        grid.append(
+            f'<tr class="JobAdRow"><td><div class="JobAdTitle">'
+            f'<a target="_self" href="Preview.aspx?Language=English&amp;JobID={row["Job ID"]}">{escape(row["Job Title"])}</a></div>'
+            f'{fields}<div class="JobAdLinks"><a target="_self" href="Preview.aspx?Language=English&amp;JobID={row["Job ID"]}">View job</a></div></td></tr>'
+        )
+    pager = '<a href="javascript:__doPostBack(&#39;ctl00$MainContent$gvSearchResults&#39;,&#39;Page$Prev&#39;)">Previous</a>' if page_no > 1 else ''
+    if page_no < total_pages:
+        pager += '<a href="javascript:__doPostBack(&#39;ctl00$MainContent$gvSearchResults&#39;,&#39;Page$Next&#39;)">Next</a>'
+    else:
+        pager += '<a class="aspNetDisabled">Next</a>'
+    body = (
+        f'<h1>Search Results</h1><p>Page {page_no} of {total_pages}</p>'
+        f'<table id="ctl00_MainContent_gvSearchResults" class="table">{"".join(grid)}</table>'
+        f'<div class="pager">{pager}</div>'
+    )
+    return page_shell('Job Search Results', body, state_seed or f'listing-{page_no}')
+
+def posting_page_html(row):
+    """
+    Renders a Preview.aspx job ad: title, the ad text and a label/value block per field.
+    """
+    paragraphs = ''.join(f'<p>{escape(line)}</p>' for line in str(row['Job Description']).splitlines() if line.strip())
+    fields = ''.join(
+        f'<div class="row"><div class="col-sm-3"><span class="JobAdLabel">{field}:</span></div>'
+        f'<div class="col-sm-9"><span>{escape(str(row[field]) if pd.notna(row[field]) else "")}</span></div></div>'
+        for field in POSTING_FIELDS if field != 'Note' or pd.notna(row[field])
+    )
+    body = (
+        f'<h1>{escape(str(row["Position Title"]))}</h1>'
+        f'<div class="row JobAdSpace"><div class="col-sm-12">{paragraphs}</div></div>'
+        f'<h2>Additional information</h2><div class="JobAdInfo">{fields}</div>'
+        f'<div class="row"><a href="PDR.aspx?JobID={row["Job ID"]}">View the position description</a></div>'
+    )
+    return page_shell(str(row['Position Title']), body, f'posting-{row["Job ID"]}')
+
+def description_page_html(row):
+    """
+    Renders a PDR.aspx position description: an <h2> heading followed by a paragraph per section.
+    """
+    lines = [line for line in str(row['Job Description']).splitlines() if line.strip()] or ['']
+    sections = ''.join(
+        f'<div class="PDRSection"><h2>{escape(section)}</h2><p>{escape(lines[i % len(lines)])}</p></div>'
+        for i, section in enumerate(PDR_SECTIONS)
+    )
+    body = f'<h1>Position Description Report</h1><div class="PDR">{sections}</div>'
+    return page_shell('Position Description Report', body, f'pdr-{row["Job ID"]}')
+
+def load_source(path):
+    df = pd.read_csv(path)
+    df.columns = [c.split('.')[0] for c in df.columns]  # Organization.1 / Salary.1 come from the detail pages
+    return df.loc[:, ~df.columns.duplicated()]
+
+def render_listing_pages(df, output_dir, pages=5):
+    total_pages = (len(df) + JOBS_PER_PAGE - 1) // JOBS_PER_PAGE
+    for page_no in range(1, min(pages, total_pages) + 1):
+        rows = df.iloc[(page_no - 1) * JOBS_PER_PAGE:page_no * JOBS_PER_PAGE]
+        with open(os.path.join(output_dir, f"listing_{str(page_no).zfill(3)}.html"), 'w', encoding='utf-8') as f:
+            f.write(listing_page_html(rows, page_no, total_pages))
+
+def render_detail_pages(df, output_dir):
+    drilled = df[df['Position Title'].notna()]
+    for _, row in drilled.iterrows():
+        with open(os.path.join(output_dir, f"preview_{row['Job ID']}.html"), 'w', encoding='utf-8') as f:
+            f.write(posting_page_html(row))
+        with open(os.path.join(output_dir, f"pdr_{row['Job ID']}.html"), 'w', encoding='utf-8') as f:
+            f.write(description_page_html(row))
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOURCE
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    df = load_source(source)
+    render_listing_pages(df, FIXTURES_DIR)
+    render_detail_pages(df, FIXTURES_DIR)
+    print(f"Rendered fixtures from {source} into {FIXTURES_DIR}")
@@ -0,0 +1,201 @@
+"""
+Local stand-in for the gojobs.gov.on.ca employee site, serving pages in the markup of
+render_fixtures.py so scraper.py and driller.py can run offline (GOJOBS_URL=<url>):
+
+    GET  /employees/                   search page with the TDA checkbox and the Search button
+    POST /employees/                   Search, or a Page$Next postback: the next results page
+    GET  /employees/Preview.aspx?JobID=<id>, /employees/PDR.aspx?JobID=<id>
+
+The jobs are the listings of a drilled CSV, cycled (with new Job IDs) to fill the requested number of
+pages; detail pages reuse its drilled rows. Every response can be delayed (latency + up to jitter
+seconds) and answered with a 429 at error_rate. Each request is recorded in `requests` as
+(kind, key, status, started, finished), kind being 'search', 'listing', 'posting' or 'description'.
+
+    python benchmarks/stand_in.py [--pages 40] [--latency 0.2] [--error-rate 0.05] [--port 8765]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from render_fixtures import (DEFAULT_SOURCE, JOBS_PER_PAGE, description_page_html, listing_page_html, load_source,
+                             page_shell, posting_page_html, viewstate)
+
+TDA_CHECKBOX = 'ctl00$MainContent$chkTDA'
+SEARCH_BUTTON = 'ctl00$MainContent$btnSearch'
+ID_STRIDE = 1000000  # Job IDs of the n-th copy of the source listings are offset by n * ID_STRIDE
+
+def search_page_html():
+    body = (
+        '<h1>Job Search</h1>'
+        f'<div class="form-group"><input type="checkbox" id="chkTDA" name="{TDA_CHECKBOX}" value="on" />'
+        '<label for="chkTDA">Yes</label></div>'
+        f'<input type="submit" name="{SEARCH_BUTTON}" value="Search" class="btn btn-primary" />'
+    )
+    return page_shell('Job Search', body, 'search')
+
+class StandIn:
+    """
+    The stand-in server on a background thread. Use as a context manager:
+
+        with StandIn(pages=10, latency=0.05) as server:
+            os.environ['GOJOBS_URL'] = server.url
+    """
+    def __init__(self, source=DEFAULT_SOURCE, pages=40, latency=0.0, jitter=0.0, error_rate=0.0, retry_after=None, port=0, seed=0):
+        listings = load_source(source)
+        copies = -(-pages * JOBS_PER_PAGE // len(listings))
+        rows = []
+        for n in range(copies):
+            for _, row in listings.iterrows():
+                rows.append(row.copy())
+                rows[-1]['Job ID'] = int(row['Job ID']) + n * ID_STRIDE
+        self.jobs = rows[:pages * JOBS_PER_PAGE]
+        self.segments = {'Open': self.jobs, 'TDA': self.jobs[::3]}
+        self.job_rows = {row['Job ID']: row for row in self.jobs}
+        self.templates = [row for _, row in listings[listings['Position Title'].notna()].iterrows()]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.states = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/employees/"
+
+    def total_pages(self, segment):
+        return -(-len(self.segments[segment]) // JOBS_PER_PAGE)
+
+    @lru_cache(maxsize=None)
+    def listing_page(self, segment, page_no):
+        rows = self.segments[segment][(page_no - 1) * JOBS_PER_PAGE:page_no * JOBS_PER_PAGE]
+        seed = f'listing-{segment}-{page_no}'
+        with self.lock:
+            self.states[viewstate(seed)] = (segment, page_no)
+        return listing_page_html(pd.DataFrame(rows), page_no, self.total_pages(segment), seed)
+
+    @lru_cache(maxsize=None)
+    def detail_row(self, job_id):
+        listing = self.job_rows[job_id]
+        row = self.templates[job_id % len(self.templates)].copy()
+        row['Job ID'] = job_id
+        row['Position Title'] = listing['Job Title']
+        return row
+
+    def delay(self):
+        """
+        Sleeps for the simulated latency and decides whether to answer with a 429.
+        """
+        with self.lock:
+            wait = self.latency + self.random.uniform(0, self.jitter)
+            throttled = self.random.random() < self.error_rate
+        if wait:
+            time.sleep(wait)
+        return throttled
+
+    def respond(self, method, path, query, form):
+        """
+        Returns (kind, key, status, html) for a request.
+        """
+        if path.endswith('/Preview.aspx') or path.endswith('/PDR.aspx'):
+            kind = 'posting' if path.endswith('/Preview.aspx') else 'description'
+            job_id = int(query.get('JobID', ['0'])[0])
+            if job_id not in self.job_rows:
+                return kind, job_id, 404, 'Not found'
+            render = posting_page_html if kind == 'posting' else description_page_html
+            return kind, job_id, 200, render(self.detail_row(job_id))
+        if method == 'GET':
+            return 'search', None, 200, search_page_html()
+        if form.get('__EVENTARGUMENT') == 'Page$Next':
+            with self.lock:
+                segment, page_no = self.states.get(form.get('__VIEWSTATE'), (None, None))
+            if segment is None:
+                return 'listing', None, 400, 'Unknown view state'
+            page_no = min(page_no + 1, self.total_pages(segment))
+        else:
+            segment, page_no = ('TDA' if form.get(TDA_CHECKBOX) else 'Open'), 1
+        return 'listing', (segment, page_no), 200, self.listing_page(segment, page_no)
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real site
+
+            def log_message(self, *args):
+                pass
+
+            def handle_request(self, method):
+                started = time.perf_counter()
+                url = urlparse(self.path)
+                form = {}
+                if method == 'POST':
+                    body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                    form = {k: v[-1] for k, v in parse_qs(body, keep_blank_values=True).items()}
+                kind, key, status, html = stand_in.respond(method, url.path, parse_qs(url.query), form)
+                if stand_in.delay():
+                    status, html = 429, 'Too Many Requests'
+                data = html.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                if status == 429 and stand_in.retry_after is not None:
+                    self.send_header('Retry-After', str(stand_in.retry_after))
+                self.end_headers()
+                self.wfile.write(data)
+                with stand_in.lock:
+                    stand_in.requests.append((kind, key, status, started, time.perf_counter()))
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help="Drilled CSV the jobs are taken from")
+    parser.add_argument('--pages', type=int, default=40, help="Results pages of the Open segment")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many more seconds, at random")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument('--retry-after', type=int, default=None, help="Retry-After seconds sent with a 429")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = StandIn(args.source, args.pages, args.latency, args.jitter, args.error_rate, args.retry_after, args.port)
+    print(f"Serving {len(server.jobs)} jobs on {server.url} (GOJOBS_URL={server.url}), Ctrl+C to stop")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
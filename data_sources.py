@@ -0,0 +1,110 @@
+"""
+Where the drilled jobs come from: the snapshots of the job store (see job_store.py), one Parquet
+file per drill hour with the normalized columns already computed.
+
+    LocalSource('data/store/jobs')     files of a checkout, read in place
+    GitHubSource('pspon/ops-scraper')  the repository's data/store/jobs over the GitHub API
+
+Both return local paths from drill_files(), oldest first, so callers (sync_index, ...) never touch
+the network themselves. GitHubSource lists the store with one API call and downloads only the
+files whose blob SHA is not in its cache yet, several at a time; every file is downloaded once.
+"""
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+import requests
+
+DRILL_PATTERN = os.path.join('snapshot_date=*', '*.parquet')
+GITHUB_REPO = 'pspon/ops-scraper'
+GITHUB_CACHE_DIR = os.path.join('data', 'cache', 'github')
+
+class LocalSource:
+    """
+    Job store snapshots in a local directory.
+    """
+    def __init__(self, root=os.path.join('data', 'store', 'jobs')):
+        self.root = root
+
+    def drill_files(self):
+        return sorted(glob(os.path.join(self.root, DRILL_PATTERN)), key=os.path.basename)
+
+class GitHubSource:
+    """
+    Job store snapshots of a GitHub repository, mirrored into cache_dir/<blob sha>/<file name>.
+    """
+    def __init__(self, repo=GITHUB_REPO, path='data/store/jobs', ref=None, cache_dir=GITHUB_CACHE_DIR, workers=8):
+        self.repo = repo
+        self.path = path
+        self.ref = ref
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.session = requests.Session()
+        token = os.getenv("GITHUB_TOKEN")
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"  # Higher API rate limit in workflows
+
+    def cached_path(self, entry):
+        return os.path.join(self.cache_dir, entry['sha'], entry['name'])
+
+    def list_files(self):
+        """
+        Lists the snapshots under the directory, partitions included, as entries (name, sha, download_url).
+        """
+        ref = self.ref or 'HEAD'
+        response = self.session.get(f"https://api.github.com/repos/{self.repo}/git/trees/{ref}:{self.path}",
+                                    params={'recursive': 1}, timeout=60)
+        response.raise_for_status()
+        return [
+            {'name': os.path.basename(item['path']), 'sha': item['sha'],
+             'download_url': f"https://raw.githubusercontent.com/{self.repo}/{ref}/{self.path}/{item['path']}"}
+            for item in response.json()['tree'] if item['type'] == 'blob' and item['path'].endswith('.parquet')
+        ]
+
+    def download(self, entry):
+        """
+        Downloads one file into the cache. Returns False (after printing why) if it failed.
+        """
+        path = self.cached_path(entry)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with self.session.get(entry['download_url'], stream=True, timeout=60) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                with open(path + '.part', 'wb') as f:
+                    shutil.copyfileobj(response.raw, f)
+        except requests.RequestException as e:
+            print(f"Failed to download {entry['name']}: {e}")
+            return False
+        os.replace(path + '.part', path)
+        return True
+
+    def drill_files(self):
+        """
+        Downloads the files missing from the cache and returns the local paths of all of them.
+        If the directory cannot be listed, the files cached by earlier runs are returned instead.
+        """
+        try:
+            entries = self.list_files()
+        except requests.RequestException as e:
+            print(f"Failed to list {self.repo}/{self.path} ({e}), using cached files.")
+            return sorted(glob(os.path.join(self.cache_dir, '*', '*.parquet')), key=os.path.basename)
+
+        missing = [entry for entry in entries if not os.path.exists(self.cached_path(entry))]
+        if missing:
+            print(f"Downloading {len(missing)} of {len(entries)} job snapshots from {self.repo}...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self.download, missing))
+        paths = [self.cached_path(entry) for entry in entries]
+        return sorted((path for path in paths if os.path.exists(path)), key=os.path.basename)
+
+def open_source(kind=None):
+    """
+    Returns the data source named by kind, or by JOB_DATA_SOURCE ('local' or 'github', default 'local').
+    """
+    kind = kind or os.getenv("JOB_DATA_SOURCE", "local")
+    if kind == 'local':
+        return LocalSource()
+    if kind == 'github':
+        return GitHubSource(os.getenv("JOB_DATA_REPO", GITHUB_REPO))
+    raise ValueError(f"Unknown data source {kind!r}, expected 'local' or 'github'.")
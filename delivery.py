@@ -0,0 +1,72 @@
+"""
+Delivers the alert emails, every message of a run over one authenticated SMTP connection.
+
+    SMTP_HOST, SMTP_PORT            the server, smtp.gmail.com:587 by default
+    SMTP_STARTTLS                   '0' for plain SMTP, e.g. a local stand-in (python -m aiosmtpd -n -l localhost:1025)
+    SENDER_EMAIL, EMAIL_PASSWORD    the login; without a password the session is not authenticated
+"""
+import os
+import smtplib
+
+class Mailer:
+    """
+    One SMTP session, opened on the first message and reopened if the server drops it.
+    """
+    def __init__(self, host=None, port=None, starttls=None, sender=None, password=None):
+        self.host = host or os.getenv("SMTP_HOST", "smtp.gmail.com")
+        self.port = int(port or os.getenv("SMTP_PORT", 587))
+        self.starttls = starttls if starttls is not None else os.getenv("SMTP_STARTTLS", "1") != "0"
+        self.sender = sender or os.getenv("SENDER_EMAIL")
+        self.password = password or os.getenv("EMAIL_PASSWORD")
+        self.server = None
+
+    def connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=60)
+        if self.starttls:
+            server.starttls()
+        if self.password:
+            server.login(self.sender, self.password)
+        self.server = server
+
+    def send(self, msg):
+        if self.server is None:
+            self.connect()
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.connect()
+            self.server.send_message(msg)
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                pass
+            self.server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def send_messages(messages, mailer=None):
+    """
+    Sends the messages over one connection. A message that fails is reported and skipped.
+    Returns the messages that were sent.
+    """
+    sent = []
+    with mailer or Mailer() as session:
+        for msg in messages:
+            if not msg['From']:
+                msg['From'] = session.sender
+            try:
+                session.send(msg)
+            except (smtplib.SMTPException, OSError) as e:
+                print(f"Error sending to {msg['To']}: {e}")
+                session.close()
+                continue
+            sent.append(msg)
+            print(f"Email sent to {msg['To']}: {msg['Subject']}")
+    return sent
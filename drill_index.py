@@ -0,0 +1,71 @@
+import hashlib
+import os
+from glob import glob
+import pandas as pd
+
+# Listing columns that change when a posting is amended (closing date extended, salary revised, ...)
+FINGERPRINT_COLUMNS = ['Job Title', 'Organization', 'Salary', 'Location', 'Closing Date']
+INDEX_COLUMNS = ['Job ID', 'Fingerprint', 'Drilled At']
+INDEX_FILE = os.path.join('data', 'jobs', 'drilled_index.csv')
+
+def listing_fingerprint(df):
+    """
+    Computes a stable fingerprint for each listing row from the columns shown on the search results page.
+    """
+    if df.empty:
+        return pd.Series(index=df.index, dtype=object)  # agg() over no rows returns a frame
+    joined = df.reindex(columns=FINGERPRINT_COLUMNS).fillna('').astype(str).agg('\x1f'.join, axis=1)
+    return joined.map(lambda s: hashlib.sha1(s.encode('utf-8')).hexdigest())
+
+def seed_drill_index(jobs_dir=os.path.join('data', 'jobs')):
+    """
+    Rebuilds the drilled-ID index from the scraped_jobs.csv files of earlier runs.
+    Only rows whose detail pages were actually drilled (Position Title present) are indexed.
+    """
+    frames = []
+    for file_path in sorted(glob(os.path.join(jobs_dir, '*_scraped_jobs.csv'))):
+        drilled = pd.read_csv(file_path, usecols=lambda c: c in ['Job ID', 'Position Title'] + FINGERPRINT_COLUMNS)
+        drilled = drilled[drilled['Position Title'].notna()]
+        frames.append(pd.DataFrame({
+            'Job ID': drilled['Job ID'].astype('int64'),
+            'Fingerprint': listing_fingerprint(drilled),
+            'Drilled At': os.path.basename(file_path)[:len('YYYYMMDD_HH')]
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    index = pd.concat(frames, ignore_index=True)
+    return index.drop_duplicates(subset=['Job ID', 'Fingerprint'], keep='last').reset_index(drop=True)
+
+def load_drill_index(path=INDEX_FILE):
+    """
+    Loads the persistent drilled-ID index, seeding it from earlier drill outputs on first use.
+    """
+    if os.path.exists(path):
+        return pd.read_csv(path, dtype={'Job ID': 'int64', 'Fingerprint': str, 'Drilled At': str})
+    print(f"No drill index at {path}, seeding from earlier drill outputs...")
+    return seed_drill_index(os.path.dirname(path))
+
+def select_undrilled(df, index):
+    """
+    Returns the listing rows whose (Job ID, fingerprint) pair has not been drilled yet,
+    i.e. postings that are new or whose listing fields changed since they were last drilled.
+    """
+    keys = pd.MultiIndex.from_arrays([df['Job ID'].astype('int64'), listing_fingerprint(df)])
+    known = pd.MultiIndex.from_frame(index[['Job ID', 'Fingerprint']])
+    return df[~keys.isin(known)].reset_index(drop=True)
+
+def update_drill_index(index, drilled_df, drilled_at, path=INDEX_FILE):
+    """
+    Records the drilled listing rows in the index and writes it back to disk.
+    """
+    new_entries = pd.DataFrame({
+        'Job ID': drilled_df['Job ID'].astype('int64'),
+        'Fingerprint': listing_fingerprint(drilled_df),
+        'Drilled At': drilled_at
+    })
+    index = pd.concat([index, new_entries], ignore_index=True)
+    index = index.drop_duplicates(subset=['Job ID', 'Fingerprint'], keep='last').reset_index(drop=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    index.to_csv(path, index=False)
+    return index
@@ -0,0 +1,153 @@
+"""
+Persistent queue of listings waiting to be drilled, fed by every listing crawl so new postings are
+drilled minutes after they show up instead of at the next scheduled drill.
+
+    data/queue/drill.db
+
+scraper.crawl() enqueues the listings that are new or changed since they were last drilled (the same
+test as the drill index), keyed by (Job ID, listing fingerprint), so re-crawling a posting that is
+still waiting adds nothing. A worker claims a batch under a lease, drills it with drill_listings()
+and only then acknowledges it; a batch whose worker dies is handed out again once its lease runs
+out, and jobs whose detail pages could not be fetched are released for a later retry. Delivery is
+at-least-once: a job may be drilled twice, never skipped.
+
+    python drill_queue.py work [--once]    # drill queued listings as they arrive (--once: until the queue is empty)
+    python drill_queue.py status
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+import pandas as pd
+from drill_index import listing_fingerprint
+
+QUEUE_DB = os.path.join('data', 'queue', 'drill.db')
+LEASE_SECONDS = float(os.getenv("DRILL_QUEUE_LEASE", 30 * 60))  # A claimed batch is handed out again after this long
+RETRY_SECONDS = float(os.getenv("DRILL_QUEUE_RETRY_DELAY", 10 * 60))  # A listing that failed waits this long before its next try
+MAX_ATTEMPTS = int(os.getenv("DRILL_QUEUE_MAX_ATTEMPTS", 5))  # Listings still failing after this many drills are dropped
+
+def open_queue(path=QUEUE_DB):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)  # Transactions are explicit
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS queue (
+            "Job ID" INTEGER, "Fingerprint" TEXT, "Listing" TEXT, "Enqueued At" REAL,
+            "Leased Until" REAL DEFAULT 0, "Attempts" INTEGER DEFAULT 0,
+            PRIMARY KEY ("Job ID", "Fingerprint")
+        )
+    """)
+    return conn
+
+def enqueue(conn, listings):
+    """
+    Adds listing rows to the queue, skipping the ones already waiting. Returns the number added.
+    """
+    if listings.empty:
+        return 0
+    keys = zip(listings['Job ID'].astype('int64'), listing_fingerprint(listings))
+    rows = listings.astype(object).where(listings.notna(), None).to_dict('records')
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    before = conn.total_changes
+    conn.executemany('INSERT OR IGNORE INTO queue ("Job ID", "Fingerprint", "Listing", "Enqueued At") VALUES (?, ?, ?, ?)',
+                     [(int(job_id), fingerprint, json.dumps(row, default=str), now) for (job_id, fingerprint), row in zip(keys, rows)])
+    added = conn.total_changes - before
+    conn.execute('COMMIT')
+    return added
+
+def claim(conn, limit=50, lease=LEASE_SECONDS):
+    """
+    Leases up to limit listings that are not leased yet (or whose lease ran out), oldest first.
+    Returns (listings DataFrame, their queue keys).
+    """
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    claimed = conn.execute('SELECT "Job ID", "Fingerprint", "Listing" FROM queue WHERE "Leased Until" < ? ORDER BY "Enqueued At" LIMIT ?',
+                           (now, limit)).fetchall()
+    keys = [(job_id, fingerprint) for job_id, fingerprint, _ in claimed]
+    conn.executemany('UPDATE queue SET "Leased Until" = ?, "Attempts" = "Attempts" + 1 WHERE "Job ID" = ? AND "Fingerprint" = ?',
+                     [(now + lease, job_id, fingerprint) for job_id, fingerprint in keys])
+    conn.execute('COMMIT')
+    return pd.DataFrame([json.loads(listing) for _, _, listing in claimed]), keys
+
+def ack(conn, keys):
+    """
+    Removes drilled listings from the queue.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    conn.executemany('DELETE FROM queue WHERE "Job ID" = ? AND "Fingerprint" = ?', keys)
+    conn.execute('COMMIT')
+
+def release(conn, keys, max_attempts=MAX_ATTEMPTS, delay=RETRY_SECONDS):
+    """
+    Hands listings back for another try after delay seconds, dropping those that have had max_attempts already.
+    Returns the Job IDs dropped.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    dropped = [job_id for job_id, fingerprint in keys
+               if conn.execute('SELECT 1 FROM queue WHERE "Job ID" = ? AND "Fingerprint" = ? AND "Attempts" >= ?',
+                               (job_id, fingerprint, max_attempts)).fetchone()]
+    conn.executemany('DELETE FROM queue WHERE "Job ID" = ? AND "Fingerprint" = ? AND "Attempts" >= ?',
+                     [(job_id, fingerprint, max_attempts) for job_id, fingerprint in keys])
+    conn.executemany('UPDATE queue SET "Leased Until" = ? WHERE "Job ID" = ? AND "Fingerprint" = ?',
+                     [(time.time() + delay, job_id, fingerprint) for job_id, fingerprint in keys])
+    conn.execute('COMMIT')
+    return dropped
+
+def status(conn):
+    """
+    Returns (listings ready to drill, listings being drilled or waiting for a retry).
+    """
+    now = time.time()
+    waiting, leased = conn.execute('SELECT SUM("Leased Until" < ?), SUM("Leased Until" >= ?) FROM queue', (now, now)).fetchone()
+    return waiting or 0, leased or 0
+
+def drill_batch(conn, batch_size=50):
+    """
+    Claims one batch and drills it. Returns the number of listings claimed (0 when the queue is empty).
+    """
+    from driller import drill_listings  # Imported here so crawling (which only enqueues) does not load the drill stage
+
+    listings, keys = claim(conn, batch_size)
+    if not keys:
+        return 0
+    drilled = drill_listings(listings)
+    failed = set(drilled.loc[drilled['Position Title'].isna(), 'Job ID'].astype('int64')) if 'Position Title' in drilled else set()
+    ack(conn, [key for key in keys if key[0] not in failed])
+    if failed:
+        dropped = release(conn, [key for key in keys if key[0] in failed])
+        print(f"{len(failed) - len(dropped)} listings released for a retry in {RETRY_SECONDS:.0f}s" + (f", gave up on {dropped}" if dropped else ""))
+    return len(keys)
+
+def work(once=False, batch_size=50, poll_interval=30, path=QUEUE_DB):
+    """
+    Drills queued listings batch by batch. With once, returns when the queue is empty; otherwise
+    waits poll_interval seconds for new listings whenever it is. Returns the number of listings claimed.
+    """
+    conn = open_queue(path)
+    claimed = 0
+    while True:
+        count = drill_batch(conn, batch_size)
+        claimed += count
+        if count:
+            continue
+        if once:
+            break
+        time.sleep(poll_interval)
+    conn.close()
+    return claimed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['work', 'status'])
+    parser.add_argument('--once', action='store_true', help="work: stop once the queue is empty")
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv("DRILL_QUEUE_BATCH", 50)))
+    parser.add_argument('--poll-interval', type=float, default=30, help="work: seconds between checks of an empty queue")
+    args = parser.parse_args()
+    if args.command == 'work':
+        print(f"Drilled {work(args.once, args.batch_size, args.poll_interval)} queued listings")
+    else:
+        waiting, leased = status(open_queue())
+        print(f"{waiting} listings ready to drill, {leased} being drilled or waiting for a retry")
@@ -3,167 +3,317 @@
 
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+import asyncio
 import os
 import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+import multiprocessing
+import queue
+import threading
 from tqdm import tqdm
 from datetime import datetime
 import pytz
+from drill_index import load_drill_index, select_undrilled, update_drill_index
+from fetcher import AsyncFetcher
+from parsers import parse_job_pages
+from response_cache import ResponseCache
+from job_store import latest_rows, mangle_duplicates, read_snapshots, write_snapshot
+from listing_changelog import latest_snapshot, materialize, posting_types
+from data_sources import LocalSource
+from job_index import sync_index
+from normalize import normalize_jobs
 
-# Set the timezone to Eastern Time and get the current date
+# Set the timezone to Eastern Time
 eastern = pytz.timezone('America/New_York')
-eastern_date = datetime.now(eastern).strftime('%Y%m%d')
-eastern_date_hour = datetime.now(eastern).strftime('%Y%m%d_%H')
 
-# Load all relevant CSV files for today's job listings
-csv_files = sorted([f for f in os.listdir('data') if f.startswith('job_listings_' + eastern_date)])
-df = pd.concat([pd.read_csv(os.path.join('data', file)) for file in csv_files]).drop_duplicates(subset='Job ID').reset_index(drop=True)
+def load_todays_listings():
+    """
+    Loads today's job listings from the columnar store, falling back to the listing changelog.
+    """
+    eastern_date = datetime.now(eastern).strftime('%Y%m%d')
+    today = datetime.now(eastern).strftime('%Y-%m-%d')
+    df = read_snapshots('listings', start=today, end=today, categories=False)
+    if not df.empty:
+        return latest_rows(df).drop(columns='Snapshot')
+    snapshots = [(t, latest_snapshot(t)) for t in posting_types()]
+    frames = [materialize(t, snapshot) for t, snapshot in snapshots if snapshot is not None and snapshot.startswith(eastern_date)]
+    return pd.concat(frames).drop_duplicates(subset='Job ID', keep='last').reset_index(drop=True) if frames else pd.DataFrame()
+
+base_url = os.getenv("GOJOBS_URL", "https://www.gojobs.gov.on.ca/employees/")  # Or a local stand-in, see benchmarks/stand_in.py
+
+def posting_url(job_id):
+    return f"{base_url}Preview.aspx?JobID={job_id}"
 
-# Ensure the DataFrame contains the 'Job ID' column
-if 'Job ID' not in df.columns:
-    raise ValueError("CSV must contain a 'Job ID' column.")
+def description_url(job_id):
+    return f"{base_url}PDR.aspx?JobID={job_id}"
 
-def scrape_job_details_v4(job_id):
+def fetch_html(url, response_cache=None):
     """
-    Scrapes detailed information for a given job ID from the job posting and description pages.
+    Fetches HTML content from the provided URL, through the response cache when one is given.
+    Implements retry logic for handling HTTP 429 errors (Too Many Requests).
     """
-    posting_url = f"https://www.gojobs.gov.on.ca/employees/Preview.aspx?JobID={job_id}"
-    description_url = f"https://www.gojobs.gov.on.ca/employees/PDR.aspx?JobID={job_id}"
-    
-    details = {}
+    max_retries = 7
+    backoff_factor = 1  # Initial wait time for retries
 
-    def fetch_and_parse(url):
-        """
-        Fetches HTML content from the provided URL and parses it into a BeautifulSoup object.
-        Implements retry logic for handling HTTP 429 errors (Too Many Requests).
-        """
-        max_retries = 7
-        backoff_factor = 1  # Initial wait time for retries
+    if response_cache is not None:
+        text = response_cache.cached_text(url)
+        if text is not None or response_cache.replay:
+            return text
 
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(url, verify=False)
-                response.raise_for_status()
-                return BeautifulSoup(response.text, 'html.parser')
-            except requests.exceptions.HTTPError as http_err:
-                if response.status_code == 429:
-                    wait_time = backoff_factor * (2 ** attempt)  # Exponential backoff for retries
-                    print(f"429 error: Too Many Requests. Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"HTTP error occurred: {http_err}")
-                    return None
-            except Exception as err:
-                print(f"An error occurred: {err}")
-                return None
-        print("Max retries reached. Exiting.")
-        return None
-    
-    # Scrape job posting details
-    posting_soup = fetch_and_parse(posting_url)
-    if posting_soup is None:
-        return None  # Return None if there was an error fetching the posting
-    
-    # Extract relevant job details
-    try:
-        details['Position Title'] = posting_soup.find('h1').get_text(strip=True)
-        details['Job Description'] = posting_soup.find('div', class_='row JobAdSpace').get_text(separator="\n", strip=True)
-        details['Organization'] = posting_soup.find(string="Organization:").find_next().text.strip()
-        details['Division'] = posting_soup.find(string="Division:").find_next().text.strip()
-        details['City'] = posting_soup.find(string="City:").find_next().text.strip()
-        details['Language of Position(s)'] = posting_soup.find(string="Language of Position(s):").find_next().text.strip()
-        details['Job Term'] = posting_soup.find(string="Job Term:").find_next().text.strip()
-        details['Job Code'] = posting_soup.find(string="Job Code:").find_next().text.strip()
-        details['Salary'] = posting_soup.find(string="Salary:").find_next().text.strip()
-        details['Posting Status'] = posting_soup.find(string="Posting Status:").find_next().text.strip()
-        details['Job ID'] = posting_soup.find(string="Job ID:").find_next().text.strip()
-        details['Address'] = posting_soup.find(string="Address:").find_next().text.strip()
-        details['Compensation Group'] = posting_soup.find(string="Compensation Group:").find_next().text.strip()
-        details['Schedule'] = posting_soup.find(string="Schedule:").find_next().text.strip()
-        details['Category'] = posting_soup.find(string="Category:").find_next().text.strip()
-        details['Posted on'] = posting_soup.find(string="Posted on:").find_next().text.strip()
-        details['Note'] = posting_soup.find(string="Note:").find_next().text.strip() if posting_soup.find(string="Note:") else ""
-    except AttributeError as e:
-        print(f"Error parsing job posting details: {e}")
-        return None
-    
-    # Scrape job description details
-    description_soup = fetch_and_parse(description_url)
-    if description_soup is None:
-        return details  # Return details collected so far if fetching the description failed
-    
-    # Extract additional job details from the description
-    try:
-        details['Purpose of Position'] = description_soup.find_all('h2')[0].find_next('p').text.strip()
-        details['Duties and Responsibility'] = description_soup.find_all('h2')[1].find_next('p').text.strip()
-        details['Staffing & Licensing'] = description_soup.find_all('h2')[2].find_next('p').text.strip()
-        details['Knowledge'] = description_soup.find_all('h2')[3].find_next('p').text.strip()
-        details['Skills'] = description_soup.find_all('h2')[4].find_next('p').text.strip()
-        details['Freedom of Action'] = description_soup.find_all('h2')[5].find_next('p').text.strip()
-    except (AttributeError, IndexError) as e:
-        print(f"Error parsing job description details: {e}")  # Handle missing sections
-
-    return details
-
-def scrape_job(job_id):
-    """
-    Wrapper function to scrape job details for a single job ID.
-    """
-    return scrape_job_details_v4(job_id)
-
-# List to store scraped job details and failed job IDs
-job_details = []
-failed_job_ids = []
-
-# Use ThreadPoolExecutor to scrape job details concurrently
-with ThreadPoolExecutor(max_workers=5) as executor:  # Adjust the number of workers as needed
-    futures = {executor.submit(scrape_job, job_id): job_id for job_id in df['Job ID']}
-    
-    # Process each completed future
-    for future in tqdm(as_completed(futures), total=len(futures)):
-        job_id = futures[future]
+    for attempt in range(max_retries):
         try:
-            details = future.result()
-            if details:
-                job_details.append(details)
-        except Exception as e:
-            print(f"Error scraping job ID {job_id}: {e}")
+            headers = response_cache.request_headers(url) if response_cache is not None else None
+            response = requests.get(url, headers=headers, verify=False)
+            if response.status_code == 304 and response_cache is not None:
+                return response_cache.not_modified(url, response.headers)
+            response.raise_for_status()
+            if response_cache is not None:
+                return response_cache.store(url, response.headers, response.text)
+            return response.text
+        except requests.exceptions.HTTPError as http_err:
+            if response.status_code == 429:
+                wait_time = backoff_factor * (2 ** attempt)  # Exponential backoff for retries
+                print(f"429 error: Too Many Requests. Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+            else:
+                print(f"HTTP error occurred: {http_err}")
+                return None
+        except Exception as err:
+            print(f"An error occurred: {err}")
+            return None
+    print("Max retries reached. Exiting.")
+    return None
+
+async def fetch_job_pages_async(job_id, fetcher):
+    """
+    Fetches the posting and description pages of a job concurrently through the shared AsyncFetcher.
+    """
+    return await asyncio.gather(fetcher.get_text(posting_url(job_id)), fetcher.get_text(description_url(job_id)))
+
+async def fetch_stage_async(job_ids, pages, response_cache):
+    """
+    I/O stage on a single pooled AsyncFetcher: puts (job_id, posting_html, description_html)
+    on the pages queue as soon as both pages of a job are in.
+    """
+    async with AsyncFetcher(concurrency=drill_concurrency, rate=drill_rate, cache=response_cache) as fetcher:
+        async def fetch_one(job_id):
+            posting_html, description_html = await fetch_job_pages_async(job_id, fetcher)
+            await asyncio.to_thread(pages.put, (job_id, posting_html, description_html))  # Blocks while the queue is full
+        await asyncio.gather(*(fetch_one(job_id) for job_id in job_ids))
+
+def fetch_stage_threads(job_ids, pages, response_cache):
+    """
+    I/O stage on a pool of threads. Each page is a separate task, so a job's posting and
+    description are fetched concurrently; the job goes on the pages queue once both are in.
+    """
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=drill_concurrency) as executor:
+        futures = {}
+        for job_id in job_ids:
+            futures[executor.submit(fetch_html, posting_url(job_id), response_cache)] = (job_id, 'posting')
+            futures[executor.submit(fetch_html, description_url(job_id), response_cache)] = (job_id, 'description')
+        for future in as_completed(futures):
+            job_id, page = futures[future]
+            fetched.setdefault(job_id, {})[page] = future.result()
+            if len(fetched[job_id]) == 2:
+                job_pages = fetched.pop(job_id)
+                pages.put((job_id, job_pages['posting'], job_pages['description']))
+
+def parse_stage(pages, total, pool, collect):
+    """
+    Parse stage: takes fetched jobs off the pages queue and parses them in the process pool
+    (or inline when pool is None), keeping at most a couple of jobs per process in flight.
+    collect(job_id, details or exception) receives each result.
+    """
+    progress = tqdm(total=total)
+    in_flight = {}
+
+    def finish(futures):
+        for future in futures:
+            job_id = in_flight.pop(future)
+            try:
+                collect(job_id, future.result())
+            except Exception as e:
+                collect(job_id, e)
+            progress.update()
+
+    while True:
+        item = pages.get()
+        if item is None:
+            break
+        job_id, posting_html, description_html = item
+        if pool is None:
+            try:
+                collect(job_id, parse_job_pages(posting_html, description_html))
+            except Exception as e:
+                collect(job_id, e)
+            progress.update()
+            continue
+        in_flight[pool.submit(parse_job_pages, posting_html, description_html)] = job_id
+        if len(in_flight) >= 2 * drill_parse_workers:
+            finish(wait(in_flight, return_when=FIRST_COMPLETED).done)
+    finish(list(in_flight))
+    progress.close()
+
+def drill(job_ids, response_cache=None):
+    """
+    Runs the two-stage drill: the I/O stage fetches pages on a background thread and pushes the raw
+    HTML onto a bounded queue, while the parse stage turns it into details dicts on a process pool.
+    Returns (details dicts, failed job IDs).
+    """
+    pages = queue.Queue(maxsize=drill_queue_size)
+    job_details = []
+    failed_job_ids = []
+
+    def collect(job_id, details_or_error):
+        if isinstance(details_or_error, Exception):
+            print(f"Error scraping job ID {job_id}: {details_or_error}")
             failed_job_ids.append(job_id)
+        elif details_or_error:
+            job_details.append(details_or_error)
+
+    def fetch_stage():
+        try:
+            if drill_backend == "async":
+                asyncio.run(fetch_stage_async(job_ids, pages, response_cache))
+            else:
+                fetch_stage_threads(job_ids, pages, response_cache)
+        finally:
+            pages.put(None)
+
+    if drill_parse_workers == 0:
+        threading.Thread(target=fetch_stage, daemon=True).start()
+        parse_stage(pages, len(job_ids), None, collect)
+        return job_details, failed_job_ids
+
+    threading.Thread(target=fetch_stage, daemon=True).start()
+    parse_stage(pages, len(job_ids), open_parse_pool(), collect)
+    return job_details, failed_job_ids
+
+parse_pool = None
+
+def open_parse_pool():
+    """
+    Process pool of the parse stage, started on first use and reused by every later drill in the
+    process (the drill queue worker drills batch after batch). Its workers come from a forkserver,
+    so they never inherit the threads of a process forked mid-run (I/O stage, tqdm's monitor),
+    which can deadlock them.
+    """
+    global parse_pool
+    if parse_pool is None:
+        parse_pool = ProcessPoolExecutor(max_workers=drill_parse_workers, mp_context=multiprocessing.get_context('forkserver'))
+        parse_pool.submit(int).result()  # Start the workers before the first jobs arrive
+    return parse_pool
+
+# Drill backend and the size of each stage
+drill_backend = os.getenv("DRILL_BACKEND", "async")  # "async" (pooled aiohttp) or "threads" (ThreadPoolExecutor + requests)
+drill_concurrency = int(os.getenv("DRILL_CONCURRENCY", 10))  # Concurrent requests (async) or I/O threads
+drill_rate = float(os.getenv("DRILL_RATE", 5))  # Maximum requests per second shared by all async workers
+drill_parse_workers = int(os.getenv("DRILL_PARSE_WORKERS", os.cpu_count() or 1))  # Parse processes, 0 to parse inline
+drill_queue_size = int(os.getenv("DRILL_QUEUE_SIZE", 64))  # Fetched jobs waiting to be parsed
+
+def open_response_cache():
+    """
+    Response cache for detail pages; DRILL_REPLAY=1 re-parses from it without touching the network.
+    Returns None when DRILL_CACHE_DIR is set to "".
+    """
+    cache_dir = os.getenv("DRILL_CACHE_DIR", os.path.join('data', 'cache', 'http'))  # Set to "" to disable the cache
+    return ResponseCache(
+        cache_dir,
+        ttl=float(os.getenv("DRILL_CACHE_TTL", 12 * 3600)),  # Seconds a page is served without revalidation
+        max_age=float(os.getenv("DRILL_CACHE_MAX_AGE", 30 * 24 * 3600)),  # Seconds an unused page is kept
+        max_bytes=float(os.getenv("DRILL_CACHE_MAX_MB", 500)) * 1024 * 1024,
+        replay=os.getenv("DRILL_REPLAY", "0") == "1"
+    ) if cache_dir else None
+
+def drill_listings(df=None, force_drill=None):
+    """
+    Drills the detail pages of the given listings (by default today's, from the store or the changelog)
+    that are new or changed since an earlier drill, then saves the <YYYYMMDD_HH>_scraped_jobs.csv,
+    the store snapshot, the search index and the drill index. Returns the drilled frame, which is
+    empty when there was nothing new to drill.
+    """
+    eastern_date_hour = datetime.now(eastern).strftime('%Y%m%d_%H')
+    if df is None:
+        df = load_todays_listings()
+
+    # Ensure the DataFrame contains the 'Job ID' column
+    if 'Job ID' not in df.columns:
+        raise ValueError("CSV must contain a 'Job ID' column.")
+
+    # Only drill postings that are new or whose listing fields changed since an earlier run
+    if force_drill is None:
+        force_drill = os.getenv("FORCE_DRILL", "0") == "1"  # Set FORCE_DRILL=1 to re-drill every listing
+    drill_index = load_drill_index()
+    if not force_drill:
+        listed = len(df)
+        df = select_undrilled(df, drill_index)
+        print(f"{len(df)} of {listed} listings are new or changed since the last drill.")
+
+    if df.empty:
+        print("Nothing new to drill.")
+        return pd.DataFrame(columns=['Job ID'])
+
+    response_cache = open_response_cache()
+    job_details, failed_job_ids = drill(list(df['Job ID']), response_cache)
+
+    if response_cache is not None:
+        response_cache.save()
+        print(f"Response cache: {response_cache.summary()}")
+
+    # Summary of scraped results
+    print(f"Scraped details for {len(job_details)} jobs.")
+    print(f"Failed to scrape {len(failed_job_ids)} jobs: {failed_job_ids}")
+
+    # Create a DataFrame from the scraped job details
+    job_details_df = pd.DataFrame(job_details) if job_details else pd.DataFrame(columns=['Job ID'])
+
+    # Convert 'Job ID' to int64 for both DataFrames for consistency
+    df['Job ID'] = df['Job ID'].astype('int64')
+    job_details_df['Job ID'] = job_details_df['Job ID'].astype('int64')
+
+    # Identify missing job IDs that were not found during scraping
+    missing_job_ids = df[~df['Job ID'].isin(job_details_df['Job ID'])]['Job ID']
+
+    # Create the 'data/jobs' directory if it doesn't exist
+    output_dir = 'data/jobs'
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Save missing job IDs to a text file only if there are any
+    if not missing_job_ids.empty:
+        missing_job_ids_file = os.path.join(output_dir, f"{eastern_date_hour}_missing_job_ids.txt")
+        with open(missing_job_ids_file, 'w') as f:
+            for job_id in missing_job_ids:
+                f.write(f"{job_id}\n")
+
+        print(f"Missing job IDs saved to {missing_job_ids_file}.")
+    else:
+        print("No missing job IDs to save.")
+
+    # Save the results to a new CSV file in the specified directory
+    output_file = os.path.join(output_dir, f"{eastern_date_hour}_scraped_jobs.csv")
+    output_df = pd.concat([df.set_index("Job ID"), job_details_df.set_index("Job ID")], axis=1).reset_index()
+    header = list(output_df.columns)
+    output_df = output_df.set_axis(mangle_duplicates(header), axis=1)
+    if os.path.exists(output_file):
+        # The drill queue can drill several batches within the hour; keep the earlier ones in the file
+        earlier = pd.read_csv(output_file)
+        output_df = pd.concat([earlier[~earlier['Job ID'].isin(output_df['Job ID'])], output_df], ignore_index=True)
+        header = dict(zip(mangle_duplicates(header), header))
+        header = [header.get(c, c) for c in output_df.columns]
+    output_df.to_csv(output_file, index=False, header=header)
+
+    print(f"Scraping completed. Results saved to {output_file}.")
+    # Normalize dates and salaries once here, so readers of the store get typed columns
+    stored_df = normalize_jobs(output_df.copy())
+    print(f"Stored snapshot in {write_snapshot(stored_df, 'jobs', eastern_date_hour)}")
+    print(f"Search index: loaded {sync_index(LocalSource().drill_files())} new drill outputs")
+
+    # Remember what was drilled so the next run only fetches new or changed postings
+    drill_index = update_drill_index(drill_index, df[df['Job ID'].isin(job_details_df['Job ID'])], eastern_date_hour)
+    print(f"Drill index now tracks {drill_index['Job ID'].nunique()} job IDs.")
+    return output_df
 
-# Summary of scraped results
-print(f"Scraped details for {len(job_details)} jobs.")
-print(f"Failed to scrape {len(failed_job_ids)} jobs: {failed_job_ids}")
-
-# Create a DataFrame from the scraped job details
-job_details_df = pd.DataFrame(job_details)
-
-# Convert 'Job ID' to int64 for both DataFrames for consistency
-df['Job ID'] = df['Job ID'].astype('int64')
-job_details_df['Job ID'] = job_details_df['Job ID'].astype('int64')
-
-# Identify missing job IDs that were not found during scraping
-missing_job_ids = df[~df['Job ID'].isin(job_details_df['Job ID'])]['Job ID']
-
-# Create the 'data/jobs' directory if it doesn't exist
-output_dir = 'data/jobs'
-os.makedirs(output_dir, exist_ok=True)
-
-# Save missing job IDs to a text file only if there are any
-if not missing_job_ids.empty:
-    missing_job_ids_file = os.path.join(output_dir, f"{eastern_date_hour}_missing_job_ids.txt")
-    with open(missing_job_ids_file, 'w') as f:
-        for job_id in missing_job_ids:
-            f.write(f"{job_id}\n")
-    
-    print(f"Missing job IDs saved to {missing_job_ids_file}.")
-else:
-    print("No missing job IDs to save.")
-
-# Save the results to a new CSV file in the specified directory
-output_file = os.path.join(output_dir, f"{eastern_date_hour}_scraped_jobs.csv")
-output_df = pd.concat([df.set_index("Job ID"), job_details_df.set_index("Job ID")], axis=1).reset_index()
-output_df.to_csv(output_file, index=False)
-
-print(f"Scraping completed. Results saved to {output_file}.")
+if __name__ == "__main__":
+    drill_listings()
@@ -0,0 +1,115 @@
+import asyncio
+import time
+import aiohttp
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every worker of a fetcher.
+    A 429 seen by any worker halves the rate and pauses all of them; successes restore it gradually.
+    """
+    def __init__(self, rate, burst=None, min_rate=0.25):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Waits until a request may be sent. Waiters are served in arrival order.
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self, retry_after=None):
+        """
+        Backs off multiplicatively after a 429 and pauses every worker until the server allows requests again.
+        """
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def recover(self):
+        """
+        Increases the rate additively after a successful request, up to the configured maximum.
+        """
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class AsyncFetcher:
+    """
+    Asyncio HTTP client with keep-alive pooled connections, bounded concurrency and a shared rate limiter.
+    With a ResponseCache, fresh pages are served from disk and stale ones are revalidated conditionally.
+    Use as an async context manager:
+
+        async with AsyncFetcher(concurrency=10, rate=5) as fetcher:
+            html = await fetcher.get_text(url)
+    """
+    def __init__(self, concurrency=10, rate=5, max_retries=7, timeout=30, cache=None):
+        self.concurrency = concurrency
+        self.cache = cache
+        self.limiter = TokenBucket(rate)
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.session = None
+
+    async def __aenter__(self):
+        # ssl=False matches the requests.get(url, verify=False) calls this replaces
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency, ssl=False, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def get_text(self, url):
+        """
+        Fetches a URL and returns the response body as text, or None on error.
+        429 responses are retried after the shared limiter has slowed every worker down.
+        """
+        if self.cache is not None:
+            text = self.cache.cached_text(url)
+            if text is not None or self.cache.replay:
+                return text
+        async with self.semaphore:
+            for attempt in range(self.max_retries):
+                await self.limiter.acquire()
+                try:
+                    headers = self.cache.request_headers(url) if self.cache is not None else None
+                    async with self.session.get(url, headers=headers) as response:
+                        if response.status == 304 and self.cache is not None:
+                            self.limiter.recover()
+                            return self.cache.not_modified(url, response.headers)
+                        if response.status == 429:
+                            retry_after = response.headers.get('Retry-After')
+                            self.limiter.throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                            print(f"429 error: Too Many Requests. Slowing all workers to {self.limiter.rate:.2f} requests/s...")
+                            continue
+                        response.raise_for_status()
+                        text = await response.text()
+                except aiohttp.ClientResponseError as http_err:
+                    print(f"HTTP error occurred: {http_err}")
+                    return None
+                except Exception as err:
+                    print(f"An error occurred: {err}")
+                    return None
+                self.limiter.recover()
+                if self.cache is not None:
+                    return self.cache.store(url, response.headers, text)
+                return text
+        print("Max retries reached. Exiting.")
+        return None
@@ -0,0 +1,318 @@
+"""
+SQLite index over every drilled job, for filtered searches without scanning the whole history.
+
+    data/index/jobs.db
+
+`jobs` holds the latest row per Job ID with the normalized columns of normalize.py, with B-tree
+indexes on Closing At, Posted Date, Organization and Adjusted Minimum Salary. `jobs_fts` is an FTS5
+trigram index over the text columns, so a filter is a case-insensitive substring match like
+str.contains(..., case=False) but answered from the index. `sources` records which job store
+snapshots (see job_store.py) have been loaded and which version of each (see content_token()), so
+sync_index() only reads new files and the ones whose content changed since, e.g. by the drill queue.
+
+    conn = open_index()
+    sync_index(['data/store/jobs/snapshot_date=2024-12-19/20241219_15.parquet'])
+    search_jobs({'Job Description': 'python'}, closing_after=today, min_salary=90000)
+"""
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import date, timedelta
+import pandas as pd
+from job_store import JOB_COLUMNS, mangle_duplicates, read_snapshot
+from normalize import NORMALIZED_COLUMNS
+
+INDEX_DB = os.path.join('data', 'index', 'jobs.db')
+TEXT_COLUMNS = [c for c in JOB_COLUMNS if c != 'Job ID']
+# Normalized columns; dates are stored as ISO text so they compare and sort correctly
+DERIVED_COLUMNS = {
+    'Closing At': 'TEXT',
+    'Posted Date': 'TEXT',
+    'Closing Week': 'TEXT',
+    'Minimum Salary': 'REAL',
+    'Maximum Salary': 'REAL',
+    'Pay Frequency': 'TEXT',
+    'Adjusted Minimum Salary': 'REAL',
+    'Adjusted Maximum Salary': 'REAL',
+    'Adjusted Salary Range': 'TEXT',
+    'Source': 'TEXT',
+}
+# Bumped whenever the tables change; an index built with another version is rebuilt from its sources
+INDEX_VERSION = 6
+# Yearly-adjusted minimum salary bands of the job_counts cube: (upper bound, label)
+SALARY_BANDS = [
+    (40000, 'Under $40k'), (60000, '$40k-$60k'), (80000, '$60k-$80k'), (100000, '$80k-$100k'),
+    (120000, '$100k-$120k'), (150000, '$120k-$150k'), (None, '$150k+'),
+]
+# Dimensions of the job_counts cube; Closing Week is determined by Closing Day
+CUBE_DIMENSIONS = ['Closing Day', 'Organization', 'Category', 'Salary Band']
+CUBE_GROUPS = {'Closing Date': 'Closing Day', 'Closing Week': 'Closing Week', 'Organization': 'Organization', 'Category': 'Category', 'Salary Band': 'Salary Band'}
+# The trigram tokenizer can only look up terms of at least this many characters
+MIN_MATCH_LENGTH = 3
+
+def quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+def salary_band(row):
+    """
+    SQL expression for the salary band of a jobs row ('new' or 'old' inside a trigger).
+    """
+    salary = f'{row}."Adjusted Minimum Salary"'
+    cases = ' '.join(f"WHEN {salary} < {bound} THEN '{label}'" for bound, label in SALARY_BANDS if bound is not None)
+    return f"CASE WHEN {salary} IS NULL THEN 'Unknown' {cases} ELSE '{SALARY_BANDS[-1][1]}' END"
+
+def cube_keys(row):
+    return [f'COALESCE(substr({row}."Closing At", 1, 10), \'\')', f'COALESCE({row}."Organization", \'\')',
+            f'COALESCE({row}."Category", \'\')', salary_band(row)]
+
+def cube_add(row):
+    keys = cube_keys(row)
+    return (f'INSERT INTO job_counts ({", ".join(quote(c) for c in CUBE_DIMENSIONS)}, "Closing Week", "Jobs") '
+            f'VALUES ({", ".join(keys)}, COALESCE({row}."Closing Week", \'\'), 1) '
+            f'ON CONFLICT ({", ".join(quote(c) for c in CUBE_DIMENSIONS)}) DO UPDATE SET "Jobs" = "Jobs" + 1;')
+
+def cube_remove(row):
+    match = ' AND '.join(f'{quote(c)} = {key}' for c, key in zip(CUBE_DIMENSIONS, cube_keys(row)))
+    return f'UPDATE job_counts SET "Jobs" = "Jobs" - 1 WHERE {match}; DELETE FROM job_counts WHERE "Jobs" = 0;'
+
+def open_index(path=INDEX_DB):
+    """
+    Opens the index, creating the tables, indexes and triggers on first use.
+    The FTS index and the job_counts cube are kept up to date by triggers on jobs.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    if conn.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+        conn.executescript(f"""
+            DROP TABLE IF EXISTS jobs_fts;
+            DROP TABLE IF EXISTS jobs;
+            DROP TABLE IF EXISTS sources;
+            DROP TABLE IF EXISTS job_counts;
+            PRAGMA user_version = {INDEX_VERSION};
+        """)
+    columns = ', '.join([f'{quote("Job ID")} INTEGER PRIMARY KEY']
+                        + [f'{quote(c)} TEXT' for c in TEXT_COLUMNS]
+                        + [f'{quote(c)} {kind}' for c, kind in DERIVED_COLUMNS.items()])
+    text_columns = ', '.join(quote(c) for c in TEXT_COLUMNS)
+    new_values = ', '.join(f'new.{quote(c)}' for c in TEXT_COLUMNS)
+    old_values = ', '.join(f'old.{quote(c)}' for c in TEXT_COLUMNS)
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS jobs ({columns});
+        CREATE INDEX IF NOT EXISTS jobs_closing_at ON jobs ("Closing At");
+        CREATE INDEX IF NOT EXISTS jobs_posted_date ON jobs ("Posted Date");
+        CREATE INDEX IF NOT EXISTS jobs_organization ON jobs ("Organization");
+        CREATE INDEX IF NOT EXISTS jobs_adjusted_minimum_salary ON jobs ("Adjusted Minimum Salary");
+        CREATE INDEX IF NOT EXISTS jobs_source ON jobs ("Source");
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5({text_columns}, content='jobs', content_rowid='Job ID', tokenize='trigram');
+        CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+            INSERT INTO jobs_fts (rowid, {text_columns}) VALUES (new."Job ID", {new_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, {text_columns}) VALUES ('delete', old."Job ID", {old_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE ON jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, {text_columns}) VALUES ('delete', old."Job ID", {old_values});
+            INSERT INTO jobs_fts (rowid, {text_columns}) VALUES (new."Job ID", {new_values});
+        END;
+        CREATE TABLE IF NOT EXISTS job_counts (
+            "Closing Day" TEXT, "Organization" TEXT, "Category" TEXT, "Salary Band" TEXT, "Closing Week" TEXT, "Jobs" INTEGER,
+            PRIMARY KEY ("Closing Day", "Organization", "Category", "Salary Band")
+        );
+        CREATE TRIGGER IF NOT EXISTS job_counts_insert AFTER INSERT ON jobs BEGIN
+            {cube_add('new')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS job_counts_delete AFTER DELETE ON jobs BEGIN
+            {cube_remove('old')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS job_counts_update AFTER UPDATE ON jobs BEGIN
+            {cube_remove('old')}
+            {cube_add('new')}
+        END;
+        CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, rows INTEGER, token TEXT, stat TEXT);
+    """)
+    return conn
+
+def file_stat(location):
+    stat = os.stat(location)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def content_token(location):
+    """
+    Identifies the content of a snapshot file by its git blob SHA: the name of its cache directory for a
+    file mirrored from GitHub (see data_sources.GitHubSource), otherwise hashed from its bytes the
+    way git does, so a fresh checkout (new mtimes, same content) keeps the tokens it had.
+    """
+    parent = os.path.basename(os.path.dirname(location))
+    if re.fullmatch(r'[0-9a-f]{40}', parent):
+        return parent
+    with open(location, 'rb') as f:
+        data = f.read()
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+def index_jobs(conn, df, source, token=None, stat=None):
+    """
+    Upserts drilled rows (as read from a job store snapshot) into the index, normalized columns
+    included: they were computed once when the snapshot was written. A row only replaces one from
+    a source that sorts after it, so loading files out of order keeps the latest details.
+    """
+    frame = df.set_axis(mangle_duplicates(df.columns), axis=1).reindex(columns=JOB_COLUMNS + NORMALIZED_COLUMNS)
+    frame = frame[frame['Job ID'].notna()].drop_duplicates(subset='Job ID', keep='last')
+    frame['Job ID'] = frame['Job ID'].astype('int64')
+    frame[TEXT_COLUMNS] = frame[TEXT_COLUMNS].astype('string')
+    frame['Closing At'] = frame['Closing At'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    frame['Posted Date'] = frame['Posted Date'].dt.strftime('%Y-%m-%d')
+    frame['Source'] = source
+    columns = ['Job ID'] + TEXT_COLUMNS + list(DERIVED_COLUMNS)
+    rows = frame[columns].astype(object).where(frame[columns].notna(), None).itertuples(index=False, name=None)
+    updates = ', '.join(f'{quote(c)} = excluded.{quote(c)}' for c in columns[1:])
+    conn.executemany(
+        f'INSERT INTO jobs ({", ".join(quote(c) for c in columns)}) VALUES ({", ".join("?" * len(columns))}) '
+        f'ON CONFLICT ("Job ID") DO UPDATE SET {updates} WHERE excluded."Source" >= jobs."Source"',
+        rows
+    )
+    conn.execute('INSERT OR REPLACE INTO sources (name, rows, token, stat) VALUES (?, ?, ?, ?)', (source, len(frame), token, stat))
+
+def sync_index(locations, path=INDEX_DB):
+    """
+    Loads the job store snapshots (local paths) the index has not seen yet, or has seen with other
+    content, oldest first. A file whose size and modification time are unchanged is not hashed again.
+    Returns the number of files loaded.
+    """
+    conn = open_index(path)
+    known = {name: (token, stat) for name, token, stat in conn.execute('SELECT name, token, stat FROM sources')}
+    pending = sorted((os.path.basename(location), location) for location in locations)
+    loaded = 0
+    with conn:
+        for name, location in pending:
+            known_token, known_stat = known.get(name, (None, None))
+            stat = file_stat(location)
+            if stat == known_stat:
+                continue
+            token = content_token(location)
+            if token == known_token:
+                conn.execute('UPDATE sources SET stat = ? WHERE name = ?', (stat, name))
+                continue
+            index_jobs(conn, read_snapshot(location), name, token, stat)
+            loaded += 1
+    conn.close()
+    return loaded
+
+def match_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+def search_jobs(text_filters=None, closing_after=None, closing_on=None, closing_week=None, posted_on=None, min_salary=None, sources_from=None, path=INDEX_DB):
+    """
+    Returns the indexed jobs matching every given filter, soonest closing first:
+
+    - text_filters: {column: text}, case-insensitive substring match per column (Job ID included)
+    - closing_after: jobs still open on this date (closing later than its midnight)
+    - closing_on / posted_on: jobs closing / posted on that date
+    - closing_week: ISO week 'YYYY-WW' the job closes in
+    - min_salary: minimum yearly-adjusted salary at least this much
+    - sources_from: jobs (re)drilled in this source file or a later one, e.g. since a mailer's last run
+
+    Dates are datetime.date or 'YYYY-MM-DD'. Closing Date and Posted on come back as datetimes,
+    alongside the salary columns, Adjusted Salary Range and Closing Week.
+    """
+    clauses, params, terms = [], [], []
+    for column, text in (text_filters or {}).items():
+        if not text:
+            continue
+        if column == 'Job ID':
+            clauses.append('CAST(jobs."Job ID" AS TEXT) LIKE ?')
+            params.append(f'%{text}%')
+        elif len(text) < MIN_MATCH_LENGTH:
+            clauses.append(f'jobs.{quote(column)} LIKE ?')
+            params.append(f'%{text}%')
+        else:
+            terms.append(f'{{{quote(column)}}} : {match_phrase(text)}')
+    if closing_after is not None:
+        clauses.append('jobs."Closing At" > ?')
+        params.append(str(pd.Timestamp(closing_after).date()))
+    if closing_on is not None:
+        day = pd.Timestamp(closing_on).date()
+        clauses.append('jobs."Closing At" >= ? AND jobs."Closing At" < ?')
+        params += [str(day), str(day + timedelta(days=1))]
+    if closing_week is not None:
+        year, week = (int(part) for part in closing_week.split('-'))
+        monday = date.fromisocalendar(year, week, 1)
+        clauses.append('jobs."Closing At" >= ? AND jobs."Closing At" < ?')
+        params += [str(monday), str(monday + timedelta(days=7))]
+    if posted_on is not None:
+        clauses.append('jobs."Posted Date" = ?')
+        params.append(str(pd.Timestamp(posted_on).date()))
+    if min_salary is not None:
+        clauses.append('jobs."Adjusted Minimum Salary" >= ?')
+        params.append(min_salary)
+    if sources_from is not None:
+        clauses.append('jobs."Source" >= ?')
+        params.append(sources_from)
+
+    query = 'SELECT jobs.* FROM jobs'
+    if terms:
+        query += ' JOIN jobs_fts ON jobs_fts.rowid = jobs."Job ID"'
+        clauses.insert(0, 'jobs_fts MATCH ?')
+        params.insert(0, ' AND '.join(terms))
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += ' ORDER BY jobs."Closing At"'
+
+    conn = open_index(path)
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+
+    df['Job ID'] = df['Job ID'].astype(str)
+    df['Closing Date'] = pd.to_datetime(df.pop('Closing At'))
+    df['Posted on'] = pd.to_datetime(df.pop('Posted Date'))
+    return df.drop(columns='Source')
+
+def latest_source(path=INDEX_DB):
+    """
+    Returns the name of the newest source loaded, or None if the index is empty.
+    """
+    conn = open_index(path)
+    latest = conn.execute('SELECT MAX(name) FROM sources').fetchone()[0]
+    conn.close()
+    return latest
+
+def index_version(path=INDEX_DB):
+    """
+    A string that changes whenever sources are loaded or reloaded, for keying caches of query results.
+    """
+    conn = open_index(path)
+    count, latest = conn.execute('SELECT COUNT(*), MAX(name) FROM sources').fetchone()
+    tokens = hashlib.sha1(''.join(token or '' for (token,) in conn.execute('SELECT token FROM sources ORDER BY name')).encode()).hexdigest()
+    conn.close()
+    return f"{count}:{latest}:{tokens[:12]}"
+
+def count_jobs(by, closing_after=None, closing_on=None, text_filters=None, path=INDEX_DB):
+    """
+    Counts jobs per value of by ('Closing Date', 'Closing Week', 'Organization', 'Category' or
+    'Salary Band') from the job_counts cube, without reading any job rows. Supports the closing
+    date filters of search_jobs() and substring text_filters on Organization and Category.
+    Returns a Series of counts indexed by the group values, in order.
+    """
+    clauses, params = ['"Closing Day" != \'\''] if by in ('Closing Date', 'Closing Week') else [], []
+    if closing_after is not None:
+        clauses.append('"Closing Day" >= ?')
+        params.append(str(pd.Timestamp(closing_after).date()))
+    if closing_on is not None:
+        clauses.append('"Closing Day" = ?')
+        params.append(str(pd.Timestamp(closing_on).date()))
+    for column, text in (text_filters or {}).items():
+        if text:
+            clauses.append(f'{quote(column)} LIKE ?')
+            params.append(f'%{text}%')
+
+    group = quote(CUBE_GROUPS[by])
+    query = f'SELECT {group} AS "{by}", SUM("Jobs") AS "Jobs" FROM job_counts'
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += f' GROUP BY {group} ORDER BY {group}'
+    conn = open_index(path)
+    counts = pd.read_sql_query(query, conn, params=params).set_index(by)['Jobs']
+    conn.close()
+    if by == 'Salary Band':
+        counts = counts.reindex([label for _, label in SALARY_BANDS] + ['Unknown']).dropna().astype('int64')
+    return counts
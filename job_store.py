@@ -0,0 +1,156 @@
+"""
+Columnar job store: Parquet snapshots partitioned by snapshot date.
+
+    data/store/<dataset>/snapshot_date=YYYY-MM-DD/<YYYYMMDD_HH>[_<part>].parquet
+
+`listings` holds the search results written by scraper.py (one part per posting type), `jobs` the drilled details written by
+driller.py together with their normalized columns (see normalize.py). Only `jobs` is committed: `listings` is a local
+copy of the listing changelog (see listing_changelog.py), which readers fall back to when it is missing. Every file of a dataset has the same schema; low-cardinality text columns are
+dictionary-encoded. read_snapshots() only opens the partitions inside the requested date range and
+only decodes the requested columns.
+
+Existing CSV history can be imported with:
+
+    python job_store.py backfill [listings|jobs]
+"""
+import os
+import sys
+from datetime import datetime
+from glob import glob
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from normalize import NORMALIZED_COLUMNS, normalize_jobs
+
+STORE_DIR = os.path.join('data', 'store')
+LISTING_COLUMNS = ['Job ID', 'Job Title', 'Organization', 'Salary', 'Location', 'Closing Date']
+# Drilled CSVs carry the listing columns followed by the detail page fields; the detail page's own
+# Organization and Salary keep the .1 suffix pandas gives them when reading those CSVs.
+JOB_COLUMNS = LISTING_COLUMNS + [
+    'Position Title', 'Job Description', 'Organization.1', 'Division', 'City', 'Language of Position(s)',
+    'Job Term', 'Job Code', 'Salary.1', 'Posting Status', 'Address', 'Compensation Group', 'Schedule',
+    'Category', 'Posted on', 'Note', 'Purpose of Position', 'Duties and Responsibility', 'Staffing & Licensing',
+    'Knowledge', 'Skills', 'Freedom of Action',
+]
+DATASET_COLUMNS = {'listings': LISTING_COLUMNS, 'jobs': JOB_COLUMNS + NORMALIZED_COLUMNS}
+DICTIONARY_COLUMNS = {
+    'Organization', 'Organization.1', 'Location', 'Salary', 'Salary.1', 'Closing Date', 'Division', 'City',
+    'Language of Position(s)', 'Job Term', 'Posting Status', 'Compensation Group', 'Schedule', 'Category', 'Posted on',
+    'Closing Week', 'Pay Frequency',
+}
+# Normalized columns that are not text
+TYPED_COLUMNS = {
+    'Job ID': pa.int64(),
+    'Closing At': pa.timestamp('s'),
+    'Posted Date': pa.date32(),
+    'Minimum Salary': pa.float64(),
+    'Maximum Salary': pa.float64(),
+    'Adjusted Minimum Salary': pa.float64(),
+    'Adjusted Maximum Salary': pa.float64(),
+}
+
+def dataset_schema(dataset):
+    fields = [pa.field('Snapshot', pa.dictionary(pa.int32(), pa.string()))]
+    for column in DATASET_COLUMNS[dataset]:
+        if column in TYPED_COLUMNS:
+            fields.append(pa.field(column, TYPED_COLUMNS[column]))
+        elif column in DICTIONARY_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+def snapshot_date(snapshot):
+    return datetime.strptime(snapshot[:8], '%Y%m%d').strftime('%Y-%m-%d')
+
+def mangle_duplicates(columns):
+    """
+    Renames repeated column labels the way pd.read_csv does ('Salary', 'Salary' -> 'Salary', 'Salary.1').
+    """
+    seen = {}
+    mangled = []
+    for column in columns:
+        mangled.append(f"{column}.{seen[column]}" if column in seen else column)
+        seen[column] = seen.get(column, 0) + 1
+    return mangled
+
+def write_snapshot(df, dataset, snapshot, store_dir=STORE_DIR, part=None):
+    """
+    Writes one snapshot (e.g. '20241219_15') of a dataset ('listings' or 'jobs') to the store, or
+    one part of it (e.g. a posting type) when the snapshot is written by several crawls.
+    Columns outside the dataset schema are dropped, missing ones are written as nulls.
+    """
+    schema = dataset_schema(dataset)
+    frame = df.set_axis(mangle_duplicates(df.columns), axis=1).reindex(columns=DATASET_COLUMNS[dataset])
+    frame.insert(0, 'Snapshot', snapshot)
+    frame['Job ID'] = pd.to_numeric(frame['Job ID']).astype('int64')
+    for column in frame.columns[2:]:
+        if column not in TYPED_COLUMNS:
+            frame[column] = frame[column].astype('string')
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = pa.table([table[field.name].cast(field.type) for field in schema], schema=schema)
+
+    directory = os.path.join(store_dir, dataset, f"snapshot_date={snapshot_date(snapshot)}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{snapshot}_{part}.parquet" if part else f"{snapshot}.parquet")
+    pq.write_table(table, path, compression='zstd')
+    return path
+
+def read_snapshots(dataset, columns=None, start=None, end=None, categories=True, store_dir=STORE_DIR):
+    """
+    Reads a dataset as a DataFrame. Only the requested columns are decoded (plus Snapshot), and only
+    partitions with start <= snapshot date <= end are opened; dates are 'YYYY-MM-DD' strings or dates.
+    Dictionary-encoded columns come back as pandas categoricals, or as plain strings with categories=False.
+    """
+    root = os.path.join(store_dir, dataset)
+    schema = dataset_schema(dataset)
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=['Snapshot'] + (columns or DATASET_COLUMNS[dataset]))
+
+    partitioning = ds.partitioning(pa.schema([('snapshot_date', pa.string())]), flavor='hive')
+    source = ds.dataset(root, format='parquet', partitioning=partitioning, schema=schema.append(pa.field('snapshot_date', pa.string())))
+    predicate = None
+    for bound, compare in ((start, 'ge'), (end, 'le')):
+        if bound is None:
+            continue
+        bound = str(bound)[:10]
+        clause = ds.field('snapshot_date') >= bound if compare == 'ge' else ds.field('snapshot_date') <= bound
+        predicate = clause if predicate is None else predicate & clause
+    wanted = ['Snapshot'] + [c for c in (columns or DATASET_COLUMNS[dataset]) if c != 'Snapshot']
+    table = source.to_table(columns=wanted, filter=predicate)
+    if not categories:
+        table = table.cast(pa.schema([pa.field(f.name, f.type.value_type if pa.types.is_dictionary(f.type) else f.type) for f in table.schema]))
+    return table.to_pandas(date_as_object=False)
+
+def read_snapshot(path):
+    """
+    Reads one snapshot file of the store, e.g. as listed by data_sources.LocalSource.
+    """
+    return pq.read_table(path).to_pandas(date_as_object=False)
+
+def latest_rows(df):
+    """
+    Keeps the most recent snapshot's row for every Job ID.
+    """
+    order = df['Snapshot'].astype(str).to_numpy().argsort(kind='stable')
+    return df.iloc[order].drop_duplicates(subset='Job ID', keep='last').reset_index(drop=True)
+
+def backfill(data_dir='data', store_dir=STORE_DIR, datasets=('listings', 'jobs')):
+    """
+    Imports the existing job_listings_*.csv and data/jobs/*_scraped_jobs.csv files into the store.
+    """
+    for file_path in sorted(glob(os.path.join(data_dir, 'job_listings_*.csv'))) if 'listings' in datasets else []:
+        name = os.path.basename(file_path)[len('job_listings_'):-len('.csv')]
+        snapshot, posting_type = name[:len('YYYYMMDD_HH')], name[len('YYYYMMDD_HH_'):]
+        write_snapshot(pd.read_csv(file_path), 'listings', snapshot, store_dir, posting_type)
+    for file_path in sorted(glob(os.path.join(data_dir, 'jobs', '*_scraped_jobs.csv'))) if 'jobs' in datasets else []:
+        snapshot = os.path.basename(file_path)[:len('YYYYMMDD_HH')]
+        write_snapshot(normalize_jobs(pd.read_csv(file_path)), 'jobs', snapshot, store_dir)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['backfill'] and set(sys.argv[2:]) <= set(DATASET_COLUMNS):
+        backfill(datasets=sys.argv[2:] or tuple(DATASET_COLUMNS))
+        print(f"Imported CSV history into {STORE_DIR}")
+    else:
+        sys.exit("usage: python job_store.py backfill [listings|jobs]")
@@ -0,0 +1,217 @@
+"""
+Listing changelog: each scraped snapshot is stored as a delta against the previous one.
+
+    data/changelog/<posting_type>/<YYYYMMDD_HH>.base.csv    full snapshot, written every REBASE_INTERVAL snapshots
+    data/changelog/<posting_type>/<YYYYMMDD_HH>.delta.csv   changes since the previous snapshot
+    data/changelog/<posting_type>/<YYYYMMDD_HH>.partial.csv changes seen by a crawl that stopped early
+
+A delta has one row per change: `added` rows carry every field of a new posting, `changed` rows only
+the fields whose value differs, and a `removed` row only the Job ID. A partial delta comes from a
+delta crawl (scraper.py, DELTA_STOP_PAGES) that stopped paging once it only saw known postings, so
+it never has `removed` rows: postings it did not reach are carried over. materialize() rebuilds any
+point-in-time snapshot from the nearest base and the deltas after it.
+
+    python listing_changelog.py backfill                         # import data/job_listings_*.csv
+    python listing_changelog.py materialize 20241219_08 [Open]   # write the snapshot back out as CSV
+"""
+import csv
+import os
+import re
+import sys
+from glob import glob
+import pandas as pd
+
+CHANGELOG_DIR = os.path.join('data', 'changelog')
+DELTA_COLUMNS = ['Job ID', 'Change', 'Field', 'Value']
+REBASE_INTERVAL = int(os.getenv("CHANGELOG_REBASE_INTERVAL", 42))  # About a week of snapshots at 6 scrapes a day
+snapshot_file = re.compile(r'(\d{8}_\d{2})\.(base|delta|partial)\.csv$')
+
+def read_rows(path):
+    """
+    Reads a changelog file as (columns, list of row dicts), every value a string.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return list(reader.fieldnames or []), list(reader)
+
+def write_rows(path, columns, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def list_snapshots(posting_type, changelog_dir=CHANGELOG_DIR):
+    """
+    Returns [(snapshot, 'base' | 'delta' | 'partial', path)] for a posting type, oldest first.
+    """
+    entries = []
+    for path in glob(os.path.join(changelog_dir, posting_type, '*.csv')):
+        match = snapshot_file.search(os.path.basename(path))
+        if match:
+            entries.append((match.group(1), match.group(2), path))
+    return sorted(entries)
+
+def posting_types(changelog_dir=CHANGELOG_DIR):
+    if not os.path.isdir(changelog_dir):
+        return []
+    return sorted(d for d in os.listdir(changelog_dir) if os.path.isdir(os.path.join(changelog_dir, d)))
+
+def latest_snapshot(posting_type, changelog_dir=CHANGELOG_DIR):
+    entries = list_snapshots(posting_type, changelog_dir)
+    return entries[-1][0] if entries else None
+
+def latest_full_snapshot(posting_type, changelog_dir=CHANGELOG_DIR):
+    """
+    Returns the latest snapshot taken by a crawl of every results page, or None.
+    """
+    entries = [e for e in list_snapshots(posting_type, changelog_dir) if e[1] != 'partial']
+    return entries[-1][0] if entries else None
+
+def snapshot_state(columns, rows):
+    """
+    Turns snapshot rows into the (columns, {Job ID: row}) state deltas are computed against and applied to.
+    """
+    return list(columns), {row['Job ID']: row for row in rows}
+
+def compute_delta(previous, current):
+    """
+    Compares two snapshot states and returns the delta rows.
+    """
+    _, before = previous
+    columns, after = current
+    fields = [c for c in columns if c != 'Job ID']
+    delta = []
+    for job_id, row in after.items():
+        old = before.get(job_id)
+        if old is None:
+            delta.extend({'Job ID': job_id, 'Change': 'added', 'Field': f, 'Value': row.get(f, '')} for f in fields)
+        else:
+            delta.extend({'Job ID': job_id, 'Change': 'changed', 'Field': f, 'Value': row.get(f, '')}
+                         for f in fields if row.get(f, '') != old.get(f, ''))
+    delta.extend({'Job ID': job_id, 'Change': 'removed', 'Field': '', 'Value': ''} for job_id in before if job_id not in after)
+    return delta
+
+def is_known(state, rows):
+    """
+    Returns whether every listing row is in the snapshot state with the same values.
+    """
+    _, known = state
+    return all(job_id in known and all(known[job_id].get(f, '') == value for f, value in row.items())
+               for job_id, row in ((row['Job ID'], row) for row in rows))
+
+def apply_delta(state, delta):
+    """
+    Applies delta rows to a snapshot state in place. Surviving postings keep their order, new ones are appended.
+    """
+    columns, rows = state
+    for change in delta:
+        job_id = change['Job ID']
+        if change['Change'] == 'removed':
+            rows.pop(job_id, None)
+            continue
+        if change['Field'] not in columns:
+            columns.append(change['Field'])
+        rows.setdefault(job_id, {'Job ID': job_id})[change['Field']] = change['Value']
+    return state
+
+def to_frame(state):
+    columns, rows = state
+    return pd.DataFrame(list(rows.values()), columns=columns).fillna('')
+
+def materialize_state(posting_type, snapshot=None, changelog_dir=CHANGELOG_DIR):
+    entries = [e for e in list_snapshots(posting_type, changelog_dir) if snapshot is None or e[0] <= snapshot]
+    bases = [i for i, (_, kind, _) in enumerate(entries) if kind == 'base']
+    if not bases:
+        return None
+    state = snapshot_state(*read_rows(entries[bases[-1]][2]))
+    for _, _, path in entries[bases[-1] + 1:]:
+        apply_delta(state, read_rows(path)[1])
+    return state
+
+def materialize(posting_type, snapshot=None, changelog_dir=CHANGELOG_DIR):
+    """
+    Rebuilds the listings as of a snapshot (e.g. '20241219_08'), or the latest one if snapshot is None,
+    as a DataFrame of strings. It is empty if the changelog has nothing at or before that snapshot.
+    """
+    state = materialize_state(posting_type, snapshot, changelog_dir)
+    return to_frame(state) if state is not None else pd.DataFrame(columns=['Job ID'])
+
+def read_changes(posting_type, start=None, end=None, changelog_dir=CHANGELOG_DIR):
+    """
+    Returns every delta row between two snapshots (inclusive) with a Snapshot column, e.g. to see
+    when a posting appeared, when its closing date moved, or when it was taken down.
+    """
+    changes = []
+    for snapshot, kind, path in list_snapshots(posting_type, changelog_dir):
+        if kind != 'base' and (start is None or snapshot >= start) and (end is None or snapshot <= end):
+            changes.extend({'Snapshot': snapshot, **row} for row in read_rows(path)[1])
+    return pd.DataFrame(changes, columns=['Snapshot'] + DELTA_COLUMNS)
+
+def snapshot_path(directory, snapshot, kind):
+    """
+    Returns the path of a snapshot's file of the given kind, removing any file of another kind the
+    same snapshot left behind (e.g. a partial delta rewritten by a full crawl within the hour).
+    """
+    for other in ('base', 'delta', 'partial'):
+        if other != kind and os.path.exists(os.path.join(directory, f"{snapshot}.{other}.csv")):
+            os.remove(os.path.join(directory, f"{snapshot}.{other}.csv"))
+    return os.path.join(directory, f"{snapshot}.{kind}.csv")
+
+def write_snapshot_delta(df, posting_type, snapshot, changelog_dir=CHANGELOG_DIR, previous=None, partial=False):
+    """
+    Records a freshly scraped snapshot: as a delta against the previous snapshot, or as a new base
+    when there is none yet or REBASE_INTERVAL deltas have accumulated since the last base.
+    previous is the state of the preceding snapshot if the caller already has it. With partial, df
+    only holds the postings a crawl reached before stopping early: they are merged into the previous
+    snapshot and written as a partial delta, never as a base.
+    Returns (path written, state of this snapshot).
+    """
+    directory = os.path.join(changelog_dir, posting_type)
+    os.makedirs(directory, exist_ok=True)
+    frame = df.fillna('').astype(str)
+    current = snapshot_state(frame.columns, frame.to_dict('records'))
+    earlier = [e for e in list_snapshots(posting_type, changelog_dir) if e[0] < snapshot]
+    bases = [i for i, (_, kind, _) in enumerate(earlier) if kind == 'base']
+    if partial:
+        if previous is None:
+            previous = materialize_state(posting_type, earlier[-1][0], changelog_dir)
+        columns = list(previous[0]) + [c for c in current[0] if c not in previous[0]]
+        current = (columns, {**previous[1], **current[1]})
+        path = snapshot_path(directory, snapshot, 'partial')
+        write_rows(path, DELTA_COLUMNS, compute_delta(previous, current))
+        return path, current
+
+    if not bases or len(earlier) - bases[-1] >= REBASE_INTERVAL:
+        path = snapshot_path(directory, snapshot, 'base')
+        write_rows(path, current[0], current[1].values())
+        return path, current
+
+    if previous is None:
+        previous = materialize_state(posting_type, earlier[-1][0], changelog_dir)
+    path = snapshot_path(directory, snapshot, 'delta')
+    write_rows(path, DELTA_COLUMNS, compute_delta(previous, current))
+    return path, current
+
+def backfill(data_dir='data', changelog_dir=CHANGELOG_DIR):
+    """
+    Imports the existing job_listings_<YYYYMMDD_HH>_<posting type>.csv files into the changelog.
+    """
+    states = {}
+    for file_path in sorted(glob(os.path.join(data_dir, 'job_listings_*.csv'))):
+        name = os.path.basename(file_path)[len('job_listings_'):-len('.csv')]
+        snapshot, posting_type = name[:len('YYYYMMDD_HH')], name[len('YYYYMMDD_HH_'):]
+        listings = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+        _, states[posting_type] = write_snapshot_delta(listings, posting_type, snapshot, changelog_dir, states.get(posting_type))
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['backfill']:
+        backfill()
+        print(f"Imported listing history into {CHANGELOG_DIR}")
+    elif len(sys.argv) in (3, 4) and sys.argv[1] == 'materialize':
+        snapshot, posting_type = sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else 'Open'
+        output_file = f"job_listings_{snapshot}_{posting_type}.csv"
+        listings = materialize(posting_type, snapshot)
+        listings.to_csv(output_file, index=False)
+        print(f"Wrote {len(listings)} listings to {output_file}")
+    else:
+        sys.exit("usage: python listing_changelog.py backfill | materialize <YYYYMMDD_HH> [posting type]")
@@ -0,0 +1,60 @@
+"""
+Typed columns derived from the drilled text fields, computed column-wise (no row-wise apply).
+
+    Closing At               'Friday, January 17, 2025 11:59 pm EST' -> Timestamp('2025-01-17 23:59')
+    Posted Date              'Wednesday, December 4, 2024' -> Timestamp('2024-12-04')
+    Closing Week             ISO year and week of Closing At, '2025-03'
+    Minimum/Maximum Salary   '$1,852.71  - $2,314.51 Per Week' -> 1852.71, 2314.51
+    Pay Frequency            'Year', 'Week' or 'Hour'
+    Adjusted Minimum/Maximum Salary, Adjusted Salary Range   the salary range as yearly amounts
+"""
+import numpy as np
+import pandas as pd
+
+SALARY_PATTERN = r'\$([\d,]+\.\d{2})  - \$([\d,]+\.\d{2})'
+FREQUENCY_PATTERN = r'Per (Year|Week|Hour)'
+YEARLY_FACTOR = {'Hour': 36.25 * 52, 'Week': 52, 'Year': 1}
+NORMALIZED_COLUMNS = [
+    'Closing At', 'Posted Date', 'Closing Week', 'Minimum Salary', 'Maximum Salary', 'Pay Frequency',
+    'Adjusted Minimum Salary', 'Adjusted Maximum Salary', 'Adjusted Salary Range',
+]
+
+def parse_closing_date(values):
+    return pd.to_datetime(values.str.replace(r'\s+[A-Z]{2,4}$', '', regex=True), format='%A, %B %d, %Y %I:%M %p', errors='coerce')
+
+def parse_posted_date(values):
+    return pd.to_datetime(values, format='%A, %B %d, %Y', errors='coerce')
+
+def iso_week(dates):
+    """
+    Formats dates as 'YYYY-WW' ISO weeks; missing dates stay missing.
+    """
+    iso = dates.dt.isocalendar()
+    week = iso['year'].astype('string') + '-' + iso['week'].astype('string').str.zfill(2)
+    return week.astype(object).where(dates.notna(), None)
+
+def format_amounts(values):
+    return pd.Series(np.char.mod('%.2f', values.to_numpy(dtype=float)), index=values.index)
+
+def normalize_jobs(df):
+    """
+    Adds the NORMALIZED_COLUMNS to a frame of drilled jobs (in place) and returns it.
+    The text columns it reads from (Closing Date, Posted on, Salary) are left untouched.
+    """
+    text = df.reindex(columns=['Closing Date', 'Posted on', 'Salary']).astype('string')
+    df['Closing At'] = parse_closing_date(text['Closing Date'])
+    df['Posted Date'] = parse_posted_date(text['Posted on'])
+    df['Closing Week'] = iso_week(df['Closing At'])
+
+    salary = text['Salary'].str.extract(SALARY_PATTERN)
+    df['Minimum Salary'] = salary[0].str.replace(',', '').astype(float)
+    df['Maximum Salary'] = salary[1].str.replace(',', '').astype(float)
+    df['Pay Frequency'] = text['Salary'].str.extract(FREQUENCY_PATTERN)[0].astype(object)
+    factor = df['Pay Frequency'].map(YEARLY_FACTOR).fillna(1)
+    df['Adjusted Minimum Salary'] = df['Minimum Salary'] * factor
+    df['Adjusted Maximum Salary'] = df['Maximum Salary'] * factor
+
+    has_range = df['Adjusted Minimum Salary'].notna() & df['Adjusted Maximum Salary'].notna()
+    salary_range = '$' + format_amounts(df['Adjusted Minimum Salary']) + ' - $' + format_amounts(df['Adjusted Maximum Salary'])
+    df['Adjusted Salary Range'] = salary_range.where(has_range, None)
+    return df
@@ -0,0 +1,73 @@
+"""
+Email alerts, shared by the two mailers:
+
+    emailer        weekly, the jobs closing this week
+    daily-mailer   daily, the jobs posted today, looking only at those drilled since its last run
+                   (its high-water mark in the alert ledger)
+
+Both send each recipient one digest of the jobs they have not been sent yet.
+
+    from notify import notify
+    notify('daily-mailer')
+"""
+from datetime import datetime
+import pytz
+from alert_ledger import high_water_mark, open_ledger, prune, record_sent, set_high_water_mark, unsent
+from alerts import digest, digest_message, load_subscriptions, match_subscriptions
+from data_sources import open_source
+from delivery import send_messages
+from job_index import latest_source, search_jobs, sync_index
+
+MAILERS = {
+    'emailer': {'subject': "OPS jobs closing this week", 'back_to_top': True},
+    'daily-mailer': {'subject': "OPS jobs posted today", 'back_to_top': False},
+}
+eastern = pytz.timezone('US/Eastern')
+
+def notify(mailer='daily-mailer', sync=True):
+    """
+    Runs one of the MAILERS. sync=False skips loading new drill outputs into the search index,
+    e.g. right after drill_listings() has done so. Returns the number of digests sent.
+    """
+    if mailer not in MAILERS:
+        raise ValueError(f"Unknown mailer {mailer!r}, expected one of {', '.join(MAILERS)}.")
+    if sync:
+        sync_index(open_source().drill_files())  # JOB_DATA_SOURCE=github reads the repository remotely instead
+
+    today = datetime.now(eastern).date()
+    ledger = open_ledger()
+    subscriptions = load_subscriptions()
+    cutoffs = [subscription.get('min_salary') for subscription in subscriptions]
+    min_salary = min(cutoffs) if None not in cutoffs else None
+
+    # Find the candidate jobs once, then match every subscription's keywords in a single pass over them
+    latest = None
+    if mailer == 'emailer':
+        thisweek = f"{today.isocalendar().year}-{today.isocalendar().week:02}"
+        candidates = search_jobs(closing_after=today, closing_week=thisweek, min_salary=min_salary)
+    else:
+        # Only evaluate the jobs posted today that were drilled since the last run. Jobs re-drilled because
+        # their listing changed keep their old Posted on date, so they are not mailed as new. The last source
+        # evaluated is included again, as the drill queue may have added to it since. latest is read before
+        # searching, so every source up to it has been evaluated when the mark moves there.
+        mark = high_water_mark(ledger, mailer)
+        latest = latest_source()
+        window = {'sources_from': mark} if mark else {}
+        candidates = search_jobs(closing_after=today, posted_on=today, min_salary=min_salary, **window)
+    jobs = candidates.set_index('Job ID', drop=False)
+
+    # Send each recipient one digest of the jobs they have not been sent yet, all over one SMTP connection
+    matches = unsent(ledger, mailer, match_subscriptions(candidates, subscriptions))
+    messages = [digest_message(recipient, by_keyword, jobs, MAILERS[mailer]['subject'], MAILERS[mailer]['back_to_top'])
+                for recipient, by_keyword in matches.items()]
+    sent = send_messages(messages)
+    for msg in sent:
+        record_sent(ledger, mailer, msg['To'], digest(matches[msg['To']], jobs))
+    print(f"Sent {len(sent)} of {len(messages)} digests")
+
+    # Move the mark past the evaluated sources once every digest went out, so failed ones are retried next run
+    if latest and len(sent) == len(messages):
+        set_high_water_mark(ledger, mailer, latest)
+    prune(ledger)
+    ledger.close()
+    return len(sent)
@@ -0,0 +1,152 @@
+from itertools import takewhile
+from lxml import etree
+from lxml import html as lxml_html
+
+FIELD_CLASS = "col-sm-3 col-form-label"
+VALUE_CLASS = "col-sm-9 JobAdAlignRight"
+
+def parse_listing_page(html):
+    """
+    Extracts one row per job from a search results page: Job ID, Job Title and the listing fields
+    (Organization, Salary, Location, Closing Date, ...). Returns a list of dicts.
+
+    Walks the document once with lxml: job links give the ID/title pairs (first link per Job ID wins),
+    and each <tr> of the results grid gives the field/value pairs of the job at the same position.
+    """
+    tree = lxml_html.fromstring(html)
+    jobs = {}
+    rows = {}
+    for element in tree.iter('a', 'tr', 'div'):
+        if element.tag == 'a':
+            href = element.get('href', '')
+            if element.get('target') == '_self' and 'JobID=' in href:
+                jobs.setdefault(href.split('JobID=')[1], element.text_content().strip())
+        elif element.tag == 'tr':
+            rows[element] = ([], [])
+        else:
+            css_class = element.get('class')
+            if css_class == FIELD_CLASS or css_class == VALUE_CLASS:
+                for tr in element.iterancestors('tr'):
+                    rows[tr][css_class == VALUE_CLASS].append(element.text_content().strip())
+
+    fields = [dict(zip([f.replace(':', '') for f in names], values)) for names, values in rows.values()]
+    return [
+        {'Job ID': job_id, 'Job Title': title, **(fields[i] if i < len(fields) else {})}
+        for i, (job_id, title) in enumerate(jobs.items())
+    ]
+
+# Label text on Preview.aspx -> details key, in the column order of the drilled CSV
+POSTING_LABELS = {
+    "Organization:": 'Organization',
+    "Division:": 'Division',
+    "City:": 'City',
+    "Language of Position(s):": 'Language of Position(s)',
+    "Job Term:": 'Job Term',
+    "Job Code:": 'Job Code',
+    "Salary:": 'Salary',
+    "Posting Status:": 'Posting Status',
+    "Job ID:": 'Job ID',
+    "Address:": 'Address',
+    "Compensation Group:": 'Compensation Group',
+    "Schedule:": 'Schedule',
+    "Category:": 'Category',
+    "Posted on:": 'Posted on',
+    "Note:": 'Note',
+}
+OPTIONAL_POSTING_FIELDS = {'Note'}
+# PDR.aspx sections, in the order of their <h2> headings
+DESCRIPTION_SECTIONS = ['Purpose of Position', 'Duties and Responsibility', 'Staffing & Licensing', 'Knowledge', 'Skills', 'Freedom of Action']
+
+def parse_job_posting(posting_html):
+    """
+    Extracts the job details from a Preview.aspx page. Returns None if a required field is missing.
+
+    Walks the document once: a text node equal to a known label (e.g. "Salary:") marks that field
+    as pending, and the next element to open holds its value. The title (first <h1>) and the ad text
+    (first div.row.JobAdSpace) are captured on the same pass.
+    """
+    tree = lxml_html.fromstring(posting_html)
+    title = description = None
+    values = {}
+    pending = []
+
+    def label(text):
+        field = POSTING_LABELS.get(text)
+        if field is not None and field not in values and field not in pending:
+            pending.append(field)
+
+    def comment_tails(nodes):
+        # iterwalk skips comments, but the text after a comment is still part of the page
+        for node in nodes:
+            if not isinstance(node.tag, str):
+                label(node.tail)
+
+    for event, element in etree.iterwalk(tree, events=('start', 'end')):
+        if event == 'end':
+            if len(element) and not isinstance(element[-1].tag, str):
+                comment_tails(reversed(list(takewhile(lambda node: not isinstance(node.tag, str), reversed(element)))))
+            label(element.tail)  # Text after the element closes
+            continue
+        previous = element.getprevious()
+        if previous is not None and not isinstance(previous.tag, str):
+            comment_tails(reversed(list(takewhile(lambda node: not isinstance(node.tag, str), element.itersiblings(preceding=True)))))
+        for field in pending:
+            values[field] = element.text_content().strip()
+        pending.clear()
+        if title is None and element.tag == 'h1':
+            title = ''.join(text.strip() for text in element.xpath('.//text()'))
+        elif description is None and element.tag == 'div' and element.get('class') == 'row JobAdSpace':
+            description = "\n".join(text.strip() for text in element.xpath('.//text()') if text.strip())
+        label(element.text)
+
+    missing = [field for field in POSTING_LABELS.values() if field not in values and field not in OPTIONAL_POSTING_FIELDS]
+    if title is None or description is None or missing:
+        print(f"Error parsing job posting details: missing {'title' if title is None else 'description' if description is None else missing}")
+        return None
+
+    details = {'Position Title': title, 'Job Description': description}
+    for field in POSTING_LABELS.values():
+        details[field] = values.get(field, "")
+    return details
+
+def parse_job_description(description_html, details):
+    """
+    Adds the position description sections from a PDR.aspx page to details: the first paragraph after
+    each of the first six <h2> headings. Walks the document once.
+    """
+    tree = lxml_html.fromstring(description_html)
+    headings = 0
+    pending = []
+    paragraphs = {}
+    for element in tree.iter('h2', 'p'):
+        if element.tag == 'h2':
+            if headings < len(DESCRIPTION_SECTIONS):
+                pending.append(DESCRIPTION_SECTIONS[headings])
+            headings += 1
+        elif pending:
+            text = element.text_content().strip()
+            for section in pending:
+                paragraphs[section] = text
+            pending.clear()
+
+    # Sections are filled in order up to the first one that is missing
+    for section in DESCRIPTION_SECTIONS:
+        if section not in paragraphs:
+            print(f"Error parsing job description details: missing section {section}")  # Handle missing sections
+            break
+        details[section] = paragraphs[section]
+    return details
+
+def parse_job_pages(posting_html, description_html):
+    """
+    Parses the fetched Preview.aspx and PDR.aspx pages of one job into a details dict.
+    Returns None if the posting page is missing or unparseable; the description is optional.
+    """
+    if posting_html is None:
+        return None
+    details = parse_job_posting(posting_html)
+    if details is None:
+        return None
+    if description_html is None:
+        return details  # Return details collected so far if fetching the description failed
+    return parse_job_description(description_html, details)
@@ -0,0 +1,80 @@
+"""
+Runs pipeline stages in one process, each stage handing its output to the next in memory instead of
+every script starting over from the files:
+
+    python pipeline.py crawl drill notify          # scrape, drill what is new, email it
+    python pipeline.py crawl --posting-type TDA    # a single stage, same as POSTING_TYPE=TDA python scraper.py
+    python pipeline.py drill notify --mailer emailer
+    python pipeline.py serve-data                  # refresh the search index, then run the app on it
+
+    crawl       scraper.crawl_segments(): every --posting-type at once, merged by Job ID
+    drill       drill_queue.work(once=True): drills the listings crawl queued (and any left from earlier
+                runs) until the queue is empty; with --force-drill, driller.drill_listings() re-drills
+                every crawled listing, or all of today's
+    notify      notify.notify(); the search index is not reloaded when drill ran before it
+    serve-data  loads new drill outputs of JOB_DATA_SOURCE into the search index and starts
+                `streamlit run app/app.py` over it, unless --no-app
+
+Options not given fall back to the environment variables the scripts read (POSTING_TYPE, PAGE_LIMIT, ...).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import pandas as pd
+from data_sources import open_source
+from driller import drill_listings
+from drill_queue import work
+from job_index import sync_index
+from notify import MAILERS, notify
+from scraper import POSTING_TYPES, crawl_segments
+
+STAGES = ['crawl', 'drill', 'notify', 'serve-data']
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'app.py')
+
+def serve_data(source=None, app=True):
+    """
+    Brings the search index up to date with the data source and, if app, runs the Streamlit app on it.
+    """
+    source = source or os.getenv("JOB_DATA_SOURCE", "local")
+    print(f"Search index: loaded {sync_index(open_source(source).drill_files())} new drill outputs")
+    if app:
+        subprocess.run([sys.executable, '-m', 'streamlit', 'run', APP], env=dict(os.environ, JOB_DATA_SOURCE=source), check=True)
+
+def run(stages, posting_types=None, page_limit=None, listing_mode=None, force_drill=None, mailer='daily-mailer', source=None, app=True):
+    """
+    Runs the stages in order. Returns the output of the last one (listings, listings drilled or digests sent).
+    """
+    output = None
+    drilled = False
+    for stage in stages:
+        print(f"== {stage}")
+        if stage == 'crawl':
+            output = crawl_segments(posting_types, page_limit, listing_mode)
+        elif stage == 'drill':
+            if force_drill:
+                output = drill_listings(output if isinstance(output, pd.DataFrame) else None, force_drill)
+            else:
+                output = work(once=True)
+            drilled = True
+        elif stage == 'notify':
+            output = notify(mailer, sync=not drilled)
+        elif stage == 'serve-data':
+            serve_data(source, app)
+        else:
+            raise ValueError(f"Unknown stage {stage!r}, expected one of {', '.join(STAGES)}.")
+    return output
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__[__doc__.index('    python'):])
+    parser.add_argument('stages', nargs='+', choices=STAGES, help="Stages to run, in order")
+    parser.add_argument('--posting-type', action='append', dest='posting_types', choices=POSTING_TYPES, help="crawl: can be repeated")
+    parser.add_argument('--page-limit', type=int, help="crawl: results pages per posting type")
+    parser.add_argument('--listing-mode', choices=['auto', 'http', 'browser'], help="crawl: how the results are fetched")
+    parser.add_argument('--force-drill', action='store_true', default=None, help="drill: re-drill every listing")
+    parser.add_argument('--mailer', choices=list(MAILERS), default='daily-mailer', help="notify: which alerts to send")
+    parser.add_argument('--source', choices=['local', 'github'], help="serve-data: where drill outputs come from")
+    parser.add_argument('--no-app', dest='app', action='store_false', help="serve-data: only refresh the search index")
+    args = parser.parse_args()
+    run(args.stages, args.posting_types, args.page_limit, args.listing_mode, args.force_drill, args.mailer, args.source, args.app)
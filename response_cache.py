@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache for detail pages.
+
+    Bodies are content-addressed (objects/<sha256>), so identical pages are stored once.
+    index.json maps each URL to its validators, body hash and timestamps.
+
+    - Within ttl seconds of being fetched, a URL is served from disk without any request.
+    - After that, it is revalidated with the ETag / Last-Modified the server sent for it, if any
+      (otherwise it is fetched again in full); a 304 refreshes it and its validators.
+    - In replay mode every lookup is served from disk and the network is never used.
+    - On save, entries unused for max_age seconds are evicted, then least-recently-used ones
+      until the bodies fit in max_bytes.
+    """
+    def __init__(self, root, ttl=12 * 3600, max_age=30 * 24 * 3600, max_bytes=500 * 1024 * 1024, replay=False):
+        self.root = root
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'not_modified': 0, 'stored': 0, 'misses': 0}
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self.index_file = os.path.join(root, 'index.json')
+        if os.path.exists(self.index_file):
+            with open(self.index_file, encoding='utf-8') as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    def object_path(self, sha):
+        return os.path.join(self.root, 'objects', sha[:2], sha)
+
+    def read(self, url):
+        """
+        Returns the cached body of url, or None (dropping the entry) if its object file is gone.
+        """
+        entry = self.index[url]
+        entry['accessed_at'] = time.time()
+        try:
+            with open(self.object_path(entry['sha']), 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            del self.index[url]
+            return None
+
+    def cached_text(self, url):
+        """
+        Returns the cached body if it can be used without a request (fresh, or replay mode), else None.
+        """
+        with self.lock:
+            entry = self.index.get(url)
+            if entry is not None and (self.replay or time.time() - entry['fetched_at'] < self.ttl):
+                text = self.read(url)
+                if text is not None:
+                    self.stats['hits'] += 1
+                    return text
+            if self.replay:
+                self.stats['misses'] += 1
+            return None
+
+    def request_headers(self, url):
+        """
+        Conditional request headers for revalidating a stale entry.
+        """
+        entry = self.index.get(url)
+        headers = {}
+        if entry is not None and not os.path.exists(self.object_path(entry['sha'])):
+            with self.lock:
+                self.index.pop(url, None)  # Body lost: fetch it in full rather than get a 304 for it
+        elif entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def not_modified(self, url, headers):
+        """
+        Records a 304 response and returns the cached body, or None if it was lost in the meantime.
+        """
+        with self.lock:
+            entry = self.index.get(url)
+            if entry is None:
+                return None
+            entry['fetched_at'] = time.time()
+            entry['etag'] = headers.get('ETag', entry.get('etag'))
+            entry['last_modified'] = headers.get('Last-Modified', entry.get('last_modified'))
+            self.stats['not_modified'] += 1
+            return self.read(url)
+
+    def store(self, url, headers, text):
+        """
+        Records a 200 response and returns its body. Bodies already on disk are not written again.
+        """
+        body = text.encode('utf-8')
+        sha = hashlib.sha256(body).hexdigest()
+        path = self.object_path(sha)
+        with self.lock:
+            self.stats['stored'] += 1
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(body)
+                os.replace(path + '.tmp', path)
+            now = time.time()
+            self.index[url] = {
+                'sha': sha,
+                'size': len(body),
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'fetched_at': now,
+                'accessed_at': now,
+            }
+        return text
+
+    def evict(self):
+        """
+        Drops entries unused for max_age, then least-recently-used entries until the referenced
+        bodies fit in max_bytes, then deletes bodies no entry refers to.
+        """
+        cutoff = time.time() - self.max_age
+        self.index = {url: entry for url, entry in self.index.items() if entry['accessed_at'] >= cutoff}
+        sizes = {entry['sha']: entry['size'] for entry in self.index.values()}
+        references = Counter(entry['sha'] for entry in self.index.values())
+        total = sum(sizes.values())
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]['accessed_at']):
+            if total <= self.max_bytes:
+                break
+            del self.index[url]
+            references[entry['sha']] -= 1
+            if references[entry['sha']] == 0:
+                total -= sizes[entry['sha']]
+        referenced = {entry['sha'] for entry in self.index.values()}
+        for prefix in os.listdir(os.path.join(self.root, 'objects')):
+            for sha in os.listdir(os.path.join(self.root, 'objects', prefix)):
+                if sha not in referenced:
+                    os.remove(os.path.join(self.root, 'objects', prefix, sha))
+
+    def save(self):
+        """
+        Evicts over-budget entries and writes the index back to disk.
+        """
+        with self.lock:
+            self.evict()
+            with open(self.index_file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(self.index_file + '.tmp', self.index_file)
+
+    def summary(self):
+        return ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in self.stats.items())
@@ -1,103 +1,436 @@
-from playwright.sync_api import sync_playwright
 from datetime import datetime
 import pytz
 import os
 import pandas as pd
 from glob import glob
-from tqdm import tqdm
 from bs4 import BeautifulSoup
-from time import sleep
+import csv
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from urllib.parse import urljoin
+import re
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from parsers import parse_listing_page
+from job_store import write_snapshot
+from listing_changelog import is_known, latest_full_snapshot, latest_snapshot, materialize_state, to_frame, write_snapshot_delta
+from drill_index import load_drill_index, select_undrilled
+from drill_queue import enqueue, open_queue
 
 # Configuration
 default_page_limit = 40  # Default number of pages to scrape
+POSTING_TYPES = ['Open', 'TDA']  # TDA: the search with the "Yes" (TDA eligible) box ticked
+search_url = os.getenv("GOJOBS_URL", "https://www.gojobs.gov.on.ca/employees/")  # Or a local stand-in, see benchmarks/stand_in.py
 # Set timezone to Eastern Time
 eastern = pytz.timezone('America/New_York')
-# Get the current date in Eastern Time
-current_time_et = datetime.now(eastern).strftime('%Y%m%d_%H')
-folder = f"job_listings_{current_time_et}"  # Folder name with the current date in ET
 
-# Create directories
-os.makedirs('data', exist_ok=True)
-os.makedirs(os.path.join('data', 'html'), exist_ok=True)
-os.makedirs(os.path.join('data', 'html', folder), exist_ok=True)
+# Selector for the job links of the results grid
+job_link_selector = "a[target='_self'][href*='JobID=']"
+
+def first_job_link(page):
+    """
+    Returns the href of the first job link in the results grid, or None while the grid is absent or reloading.
+    """
+    try:
+        return page.evaluate("selector => { const a = document.querySelector(selector); return a ? a.getAttribute('href') : null; }", job_link_selector)
+    except Exception:
+        return None  # Execution context destroyed mid-navigation
+
+def wait_for_results_change(page, previous_link, timeout, poll_interval=0.1):
+    """
+    Waits until the results grid shows a different first job than previous_link, i.e. the next page
+    has rendered, instead of sleeping for a fixed time. Returns the new first link, or None on timeout.
+    """
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        link = first_job_link(page)
+        if link is not None and link != previous_link:
+            page.wait_for_load_state('domcontentloaded')
+            return link
+        page.wait_for_timeout(poll_interval * 1000)
+    return None
 
 # Scrape opsjobs with playwright
-def scraper(posting_type, page_limit):
+def scraper(posting_type, page_limit, on_page):
+    from playwright.sync_api import sync_playwright  # Only needed when the browser path is used
+
+    page_timeout = float(os.getenv("PAGE_TIMEOUT", 30))  # Seconds to wait for the results grid to change
     with sync_playwright() as pw:
         browser = pw.chromium.launch(headless=True)
         context = browser.new_context(no_viewport=True, ignore_https_errors=True)
         page = context.new_page()
-        page.goto("https://www.gojobs.gov.on.ca/employees/")
+        page.goto(search_url)
         
         # Check the checkbox based on posting_type
         if posting_type == "TDA":
             page.get_by_label("Yes").check()  # Extract TDA eligible postings
         
-        # Perform the search
+        # Perform the search and wait for the first results page to render
+        started = perf_counter()
         page.get_by_role("button", name="Search", exact=True).click()
-    
+        link = wait_for_results_change(page, None, page_timeout)
+        if link is None:
+            print('Search returned no results before the timeout.')
+            browser.close()
+            return
+
         current_page = 1
+        page_times = []
     
         while current_page <= page_limit:
-            print(f"Scraping page {current_page}...")
-            page.wait_for_load_state('networkidle')
-    
             # Save the current page's HTML content
-            with open(os.path.join('data', 'html', folder, f"{posting_type}_{str(current_page).zfill(3)}.html"), 'w', encoding='utf-8') as f:
-                f.write(page.content())
+            stop = on_page(posting_type, current_page, page.content())
+            page_times.append(perf_counter() - started)
+            print(f"Scraped page {current_page} in {page_times[-1]:.2f}s")
+            if stop:
+                print('Only known postings on the last pages, stopping early.')
+                break
+            if current_page == page_limit:
+                break
     
-            # Navigate to the next page
+            # Navigate to the next page and wait for the grid to show different jobs
+            next_link = page.get_by_role("link", name="Next")
+            if next_link.count() == 0:
+                print('No more pages.')
+                break
+            started = perf_counter()
             try:
-                page.get_by_role("link", name="Next").click()
-                current_page += 1
+                next_link.first.click(timeout=page_timeout * 1000)
             except Exception:
                 print('No more pages or error occurred.')
                 break
-            sleep(5)
-            page.wait_for_load_state('networkidle')
+            link = wait_for_results_change(page, link, page_timeout)
+            if link is None:
+                print(f"Results did not change within {page_timeout:.0f}s, assuming the last page was reached.")
+                break
+            current_page += 1
     
         browser.close()
+    if page_times:
+        print(f"Browser crawl: {len(page_times)} pages, {sum(page_times):.1f}s total, {sum(page_times) / len(page_times):.2f}s per page, slowest {max(page_times):.2f}s")
 
-# Get the posting type and page limit from environment variables
-posting_type = os.getenv("POSTING_TYPE", "Open")  # Default to "Open" if not set
-page_limit = int(os.getenv("PAGE_LIMIT", default_page_limit))  # Default to default_page_limit if not set
+def save_page(folder, posting_type, current_page, html):
+    """
+    Saves the HTML of one results page under data/html/<folder>.
+    """
+    with open(os.path.join('data', 'html', folder, f"{posting_type}_{str(current_page).zfill(3)}.html"), 'w', encoding='utf-8') as f:
+        f.write(html)
 
-scraper(posting_type, page_limit)
+def form_fields(form):
+    """
+    Serializes an ASP.NET form the way a browser submits it (hidden state, text inputs,
+    checked boxes, selected options), leaving out every submit button.
+    """
+    fields = {}
+    for tag in form.find_all(['input', 'select', 'textarea']):
+        name = tag.get('name')
+        if not name or tag.has_attr('disabled'):
+            continue
+        if tag.name == 'select':
+            option = tag.find('option', selected=True) or tag.find('option')
+            if option is not None:
+                fields[name] = option.get('value', option.text)
+        elif tag.name == 'textarea':
+            fields[name] = tag.text
+        else:
+            kind = tag.get('type', 'text').lower()
+            if kind in ('submit', 'button', 'image', 'reset', 'file'):
+                continue
+            if kind in ('checkbox', 'radio') and not tag.has_attr('checked'):
+                continue
+            fields[name] = tag.get('value', 'on' if kind in ('checkbox', 'radio') else '')
+    return fields
 
-# Extract job information from saved HTML files
-files = glob(os.path.join('data', 'html', folder, '*.html'))
+def postback_target(href):
+    """
+    Extracts (event target, event argument) from a __doPostBack / WebForm_DoPostBackWithOptions link.
+    """
+    match = re.search(r"__doPostBack\('([^']*)',\s*'([^']*)'\)", href) or re.search(r'WebForm_PostBackOptions\("([^"]*)",\s*"([^"]*)"', href)
+    return match.groups() if match else None
 
-output_df = []
-for file_path in tqdm(files):
-    with open(file_path, 'rb') as file:
-        html_content = file.read()
-    
-    # Parse the HTML content using BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
-    links = soup.find_all('a', target='_self')
-    ids = [a['href'].split('JobID=')[1] for a in links if 'JobID=' in a['href']]
-    texts = [link.text.strip() for link in links]
-
-    # Generate ID and Title dataframe
-    df_ID_TITLE = pd.DataFrame({
-        'Job ID': ids,
-        'Job Title': texts
-    })
-
-    # Capture fields and values into a separate dataframe
-    trs = [t for t in soup.find_all('tr')]
-    dfs = []
-    for tr in trs:
-        fields = [div.text.strip().replace(':','') for div in tr.find_all('div',class_="col-sm-3 col-form-label")]
-        values = [div.text.strip() for div in tr.find_all('div',class_="col-sm-9 JobAdAlignRight")]
-        idf = pd.DataFrame([values], columns=fields)
-        dfs.append(idf)
-    dfs = pd.concat(dfs).reset_index(drop=True)
-
-    # Merge the two dataframe into output_df
-    output_dfi = df_ID_TITLE.drop_duplicates(subset='Job ID').reset_index(drop=True).join(dfs)
-    output_df.append(output_dfi)
-
-output_df = pd.concat(output_df).reset_index(drop=True)
-output_df.to_csv(os.path.join("data", f"{folder}_{posting_type}.csv"), index=False)
-print(f"Saved {len(output_df)} unique job listings to CSV.")
+def submit_postback(session, response, form, fields, target=None, argument=''):
+    """
+    Posts the page's form back to the server, optionally as a __doPostBack event.
+    """
+    if target is not None:
+        fields['__EVENTTARGET'] = target
+        fields['__EVENTARGUMENT'] = argument
+    action = urljoin(response.url, form.get('action') or response.url)
+    next_response = session.post(action, data=fields, timeout=60)
+    next_response.raise_for_status()
+    return next_response
+
+def page_job_count(soup):
+    return len([a for a in soup.find_all('a', target='_self') if 'JobID=' in a.get('href', '')])
+
+# Scrape opsjobs by replaying the ASP.NET search and paging postbacks over plain HTTP
+def http_scraper(posting_type, page_limit, on_page):
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    with requests.Session() as session:
+        session.verify = False  # Same as ignore_https_errors in the browser context
+        session.headers['User-Agent'] = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+        retries = Retry(total=4, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=None)
+        session.mount('https://', HTTPAdapter(max_retries=retries, pool_maxsize=1))
+        session.mount('http://', HTTPAdapter(max_retries=retries, pool_maxsize=1))
+
+        response = session.get(search_url, timeout=60)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+        form = soup.find('form')
+        if form is None:
+            raise RuntimeError("Search page has no form to post back.")
+        fields = form_fields(form)
+
+        # Check the checkbox based on posting_type
+        if posting_type == "TDA":
+            label = soup.find('label', string=lambda text: text is not None and text.strip() == "Yes")
+            checkbox = soup.find(id=label.get('for')) if label is not None else None
+            if checkbox is None:
+                raise RuntimeError("TDA 'Yes' option not found on the search page.")
+            fields[checkbox['name']] = checkbox.get('value', 'on')
+
+        # Perform the search, either as a submit button or as a postback link
+        button = form.find(lambda tag: tag.name in ('input', 'button') and tag.get('type', 'submit').lower() == 'submit'
+                           and (tag.get('value') or tag.get_text(strip=True)) == "Search")
+        if button is not None:
+            fields[button['name']] = button.get('value', '')
+            response = submit_postback(session, response, form, fields)
+        else:
+            link = soup.find('a', string=lambda text: text is not None and text.strip() == "Search")
+            target = postback_target(link.get('href', '')) if link is not None else None
+            if target is None:
+                raise RuntimeError("Search button not found on the search page.")
+            response = submit_postback(session, response, form, fields, *target)
+
+        current_page = 1
+        while current_page <= page_limit:
+            started = perf_counter()
+            soup = BeautifulSoup(response.text, 'html.parser')
+            if page_job_count(soup) == 0:
+                if current_page == 1:
+                    raise RuntimeError("Search postback returned no job listings.")
+                print('Page has no job listings, stopping.')
+                break
+            if on_page(posting_type, current_page, response.text):
+                print(f"Scraped page {current_page}. Only known postings on the last pages, stopping early.")
+                break
+
+            # Replay the "Next" pager link with the viewstate of the page we are on
+            link = soup.find('a', string=lambda text: text is not None and text.strip() == "Next")
+            href = link.get('href') if link is not None else None
+            if not href or current_page == page_limit:
+                print(f"Scraped page {current_page}. No more pages or page limit reached.")
+                break
+            target = postback_target(href)
+            form = soup.find('form')
+            if target is not None and form is not None:
+                response = submit_postback(session, response, form, form_fields(form), *target)
+            else:
+                response = session.get(urljoin(response.url, href), timeout=60)
+                response.raise_for_status()
+            print(f"Scraped page {current_page} in {perf_counter() - started:.2f}s")
+            current_page += 1
+
+def clear_pages(folder, posting_type):
+    for file_path in glob(os.path.join('data', 'html', folder, f"{posting_type}_*.html")):
+        os.remove(file_path)
+
+class ListingStream:
+    """
+    Parses results pages on a background thread as soon as the crawl captures them and appends
+    their rows to the output CSV, so parsing overlaps with navigation instead of following it.
+    """
+    columns = ['Job ID', 'Job Title', 'Organization', 'Salary', 'Location', 'Closing Date']
+    reset_marker = object()
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.part_file = output_file + '.part'
+        self.rows = []
+        self.pages = queue.Queue()
+        self.error = None
+        self.start_file()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def start_file(self):
+        os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
+        self.file = open(self.part_file, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.columns)
+        self.writer.writeheader()
+        for row in self.rows:
+            self.writer.writerow(row)
+
+    def submit(self, html):
+        """
+        Queues a results page for parsing: its HTML, or its rows if the caller has parsed it already.
+        """
+        self.pages.put(html)
+
+    def reset(self):
+        """
+        Discards every row captured so far, e.g. before a fallback crawl starts over.
+        """
+        self.pages.put(self.reset_marker)
+
+    def run(self):
+        while True:
+            html = self.pages.get()
+            if html is None:
+                break
+            if html is self.reset_marker:
+                self.rows = []
+                self.file.close()
+                self.start_file()
+                continue
+            try:
+                self.append(html if isinstance(html, list) else parse_listing_page(html))
+            except Exception as e:
+                self.error = e
+                break
+
+    def append(self, rows):
+        # A field we have not seen yet widens the header, so rewrite the file once with the new columns
+        new_columns = [c for row in rows for c in row if c not in self.columns]
+        self.rows.extend(rows)
+        if new_columns:
+            self.columns = self.columns + list(dict.fromkeys(new_columns))
+            self.file.close()
+            self.start_file()
+        else:
+            self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        """
+        Waits for the pending pages to be parsed and moves the finished CSV into place.
+        """
+        self.pages.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+        os.replace(self.part_file, self.output_file)
+        return len(self.rows)
+
+def crawl(posting_type=None, page_limit=None, listing_mode=None, save_html=None, delta_pages=None):
+    """
+    Crawls the search results of one posting type, adds the snapshot to the columnar store,
+    records what changed in the listing changelog and queues the new and changed postings for
+    drilling. Returns the listings as a DataFrame.
+
+    With delta_pages, the crawl stops once that many pages in a row held only postings the last
+    snapshot already has with the same fields (results come newest first), and the postings it did
+    not reach are carried over from that snapshot. A full crawl, the only kind that notices
+    removed postings, still runs when the last one is FULL_CRAWL_HOURS old.
+    Settings left as None come from the POSTING_TYPE, PAGE_LIMIT, LISTING_MODE, SAVE_HTML and
+    DELTA_STOP_PAGES variables.
+    """
+    posting_type = posting_type or os.getenv("POSTING_TYPE", "Open")  # Default to "Open" if not set
+    if posting_type not in POSTING_TYPES:
+        raise ValueError(f"Unknown posting type {posting_type!r}, expected one of {', '.join(POSTING_TYPES)}.")
+    page_limit = page_limit or int(os.getenv("PAGE_LIMIT", default_page_limit))  # Default to default_page_limit if not set
+    listing_mode = listing_mode or os.getenv("LISTING_MODE", "auto")  # "http", "browser", or "auto" (HTTP with browser fallback)
+    if save_html is None:
+        save_html = os.getenv("SAVE_HTML", "1") == "1"  # Set SAVE_HTML=0 to skip writing pages to data/html
+    if delta_pages is None:
+        delta_pages = int(os.getenv("DELTA_STOP_PAGES", 0))  # 0 crawls every page, up to page_limit
+    full_crawl_hours = float(os.getenv("FULL_CRAWL_HOURS", 24))
+
+    # Get the current date in Eastern Time
+    current_time_et = datetime.now(eastern).strftime('%Y%m%d_%H')
+    folder = f"job_listings_{current_time_et}"  # Folder name with the current date in ET
+    if save_html:
+        os.makedirs(os.path.join('data', 'html', folder), exist_ok=True)
+
+    # A delta crawl compares each page against the last snapshot, unless a full crawl is due
+    previous = None
+    if delta_pages:
+        last_full = latest_full_snapshot(posting_type)
+        age = (datetime.now(eastern) - eastern.localize(datetime.strptime(last_full, '%Y%m%d_%H'))).total_seconds() / 3600 if last_full else None
+        if age is None or age >= full_crawl_hours:
+            print(f"Last full crawl was {f'{age:.0f} hours ago' if age is not None else 'never'}, crawling every page.")
+        elif latest_snapshot(posting_type) < current_time_et:  # A re-run within the hour rewrites that hour's snapshot, so it crawls in full
+            previous = materialize_state(posting_type)
+
+    listing_stream = ListingStream(os.path.join("data", f"{folder}_{posting_type}.csv"))
+    known_pages = 0
+
+    def capture_page(posting_type, current_page, html):
+        """
+        Hands a captured results page to the parse stage, and optionally keeps a copy on disk.
+        Returns True when a delta crawl can stop.
+        """
+        nonlocal known_pages
+        if save_html:
+            save_page(folder, posting_type, current_page, html)
+        if previous is None:
+            listing_stream.submit(html)
+            return False
+        rows = parse_listing_page(html)  # Parsed here, as the crawl needs to know whether to go on
+        listing_stream.submit(rows)
+        known_pages = known_pages + 1 if rows and is_known(previous, rows) else 0
+        return known_pages >= delta_pages
+
+    crawl_started = perf_counter()
+    if listing_mode == "browser":
+        scraper(posting_type, page_limit, capture_page)
+    else:
+        try:
+            http_scraper(posting_type, page_limit, capture_page)
+        except Exception as e:
+            if listing_mode == "http":
+                raise
+            print(f"HTTP listing crawl failed ({e}), falling back to the browser...")
+            listing_stream.reset()
+            known_pages = 0
+            clear_pages(folder, posting_type)
+            scraper(posting_type, page_limit, capture_page)
+    print(f"Listing crawl took {perf_counter() - crawl_started:.1f}s")
+
+    saved = listing_stream.close()
+    print(f"Saved {saved} unique job listings to CSV.")
+
+    # Record what changed since the previous snapshot and add the snapshot to the columnar store
+    listings = pd.DataFrame(listing_stream.rows, columns=listing_stream.columns)
+    partial = previous is not None and known_pages >= delta_pages
+    changelog_path, state = write_snapshot_delta(listings, posting_type, current_time_et, previous=previous, partial=partial)
+    print(f"Recorded listing changes in {changelog_path}")
+    if partial:
+        listings = to_frame(state)
+        print(f"Carried over the postings past the last page crawled, {len(listings)} listings in all.")
+    print(f"Stored snapshot in {write_snapshot(listings, 'listings', current_time_et, part=posting_type)}")
+
+    # Queue the new and changed postings for the drill worker (python drill_queue.py work)
+    drill_queue = open_queue()
+    print(f"Queued {enqueue(drill_queue, select_undrilled(listings, load_drill_index()))} new or changed listings for drilling")
+    drill_queue.close()
+    return listings
+
+def crawl_segments(posting_types=None, page_limit=None, listing_mode=None, save_html=None, delta_pages=None, concurrency=None):
+    """
+    Crawls several posting types at once, each with crawl() in its own HTTP session (or browser),
+    at most concurrency at a time. Returns the listings merged into one row per Job ID.
+    Settings left as None come from POSTING_TYPE (comma-separated, e.g. "Open,TDA"),
+    CRAWL_CONCURRENCY and the variables crawl() reads.
+    """
+    posting_types = posting_types or [t.strip() for t in os.getenv("POSTING_TYPE", "Open").split(',') if t.strip()]
+    unknown = [t for t in posting_types if t not in POSTING_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown posting types {unknown}, expected {', '.join(POSTING_TYPES)}.")
+    concurrency = concurrency or int(os.getenv("CRAWL_CONCURRENCY", 2))
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(posting_types))) as pool:
+        frames = list(pool.map(lambda posting_type: crawl(posting_type, page_limit, listing_mode, save_html, delta_pages), posting_types))
+    # A TDA posting also shows up among the Open ones
+    listings = pd.concat(frames).drop_duplicates(subset='Job ID', keep='first').reset_index(drop=True)
+    counts = ', '.join(f"{posting_type} {len(frame)}" for posting_type, frame in zip(posting_types, frames))
+    print(f"Crawled {counts} listings in {perf_counter() - started:.1f}s, {len(listings)} unique.")
+    return listings
+
+if __name__ == "__main__":
+    crawl_segments()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+SAMPLE_DRILL_FILE = os.path.join(REPO_DIR, 'data', 'jobs', '20241219_15_scraped_jobs.csv')
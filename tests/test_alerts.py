@@ -0,0 +1,31 @@
+import re
+import pandas as pd
+from conftest import SAMPLE_DRILL_FILE
+from alerts import KeywordMatcher, match_subscriptions
+
+KEYWORDS = ['Analytic', 'analytics', 'Analyst', 'analysis', 'Data', 'policy', 'manage', 'Manager', 'management', 'health', 'nurse', 'C++', 'zzz-not-there']
+
+def test_keyword_matcher_agrees_with_str_contains():
+    descriptions = pd.read_csv(SAMPLE_DRILL_FILE)['Job Description']
+    matcher = KeywordMatcher(KEYWORDS)
+    found = [matcher.find(text) for text in descriptions]
+    for keyword in KEYWORDS:
+        expected = descriptions.str.contains(re.escape(keyword), case=False, na=False)
+        assert [keyword.lower() in keywords for keywords in found] == expected.tolist(), keyword
+
+def test_keyword_matcher_edge_cases():
+    matcher = KeywordMatcher(['analytics', 'Analytic', 'C++'])
+    assert matcher.find('ANALYTICS and c++') == {'analytics', 'analytic', 'c++'}
+    assert matcher.find('analytic only') == {'analytic'}
+    assert matcher.find(float('nan')) == set()
+
+def test_match_subscriptions_applies_keywords_and_salary_cutoffs():
+    jobs = pd.DataFrame({'Job ID': ['1', '2', '3'],
+                         'Job Description': ['Python developer', 'Senior PYTHON and SQL', 'Nurse'],
+                         'Adjusted Minimum Salary': [60000.0, 95000.0, None]})
+    subscriptions = [{'recipient': 'a@example.com', 'keywords': ['Python', 'SQL']},
+                     {'recipient': 'b@example.com', 'keywords': ['python', 'nurse'], 'min_salary': 90000}]
+    assert match_subscriptions(jobs, subscriptions) == {
+        'a@example.com': {'Python': ['1', '2'], 'SQL': ['2']},
+        'b@example.com': {'python': ['2']},
+    }
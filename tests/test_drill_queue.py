@@ -0,0 +1,43 @@
+import pandas as pd
+from drill_queue import ack, claim, enqueue, open_queue, release, status
+
+def listings(*job_ids):
+    return pd.DataFrame({'Job ID': job_ids, 'Job Title': [f"Job {job_id}" for job_id in job_ids],
+                         'Closing Date': 'Friday, January 2, 2026 11:59 pm EST'})
+
+def test_enqueue_skips_listings_already_waiting(tmp_path):
+    conn = open_queue(str(tmp_path / 'drill.db'))
+    assert enqueue(conn, listings(1, 2)) == 2
+    assert enqueue(conn, listings(2, 3)) == 1
+    assert status(conn) == (3, 0)
+
+def test_claimed_batch_is_leased_until_acked(tmp_path):
+    conn = open_queue(str(tmp_path / 'drill.db'))
+    enqueue(conn, listings(1, 2, 3))
+    batch, keys = claim(conn, limit=2)
+    assert list(batch['Job ID']) == [1, 2]
+    # Another worker only gets what is not leased
+    _, others = claim(conn, limit=10)
+    assert [job_id for job_id, _ in others] == [3]
+    ack(conn, keys + others)
+    assert status(conn) == (0, 0)
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    conn = open_queue(str(tmp_path / 'drill.db'))
+    enqueue(conn, listings(1))
+    _, keys = claim(conn, lease=-1)  # The worker died; its lease has already run out
+    _, again = claim(conn)
+    assert again == keys
+
+def test_release_retries_after_the_delay_then_gives_up(tmp_path):
+    conn = open_queue(str(tmp_path / 'drill.db'))
+    enqueue(conn, listings(1))
+    _, keys = claim(conn)
+    assert release(conn, keys, max_attempts=2, delay=3600) == []
+    assert claim(conn)[1] == []  # Not retried within the same run
+    assert status(conn) == (0, 1)
+
+    assert release(conn, keys, max_attempts=2, delay=-1) == []
+    _, keys = claim(conn)
+    assert release(conn, keys, max_attempts=2) == [1]
+    assert status(conn) == (0, 0)
@@ -0,0 +1,12 @@
+from datetime import datetime
+import pandas as pd
+from driller import eastern, load_todays_listings
+from listing_changelog import write_snapshot_delta
+
+def test_todays_listings_come_from_the_changelog_without_a_listing_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    snapshot = datetime.now(eastern).strftime('%Y%m%d_%H')
+    write_snapshot_delta(pd.DataFrame({'Job ID': ['1', '2'], 'Job Title': ['Analyst', 'Clerk']}), 'Open', snapshot)
+    write_snapshot_delta(pd.DataFrame({'Job ID': ['3'], 'Job Title': ['Nurse']}), 'TDA', snapshot)
+    assert not (tmp_path / 'data' / 'store').exists()
+    assert sorted(load_todays_listings()['Job ID']) == ['1', '2', '3']
@@ -0,0 +1,26 @@
+import os
+import pandas as pd
+from conftest import SAMPLE_DRILL_FILE
+from data_sources import LocalSource
+from job_index import search_jobs, sync_index
+from job_store import write_snapshot
+from normalize import normalize_jobs
+
+def test_sync_index_reloads_only_changed_content(tmp_path):
+    index_db = str(tmp_path / 'jobs.db')
+    source = LocalSource(str(tmp_path / 'jobs'))
+    df = pd.read_csv(SAMPLE_DRILL_FILE)
+    snapshot_file = write_snapshot(normalize_jobs(df.copy()), 'jobs', '20241219_15', str(tmp_path))
+    assert sync_index(source.drill_files(), index_db) == 1
+    assert sync_index(source.drill_files(), index_db) == 0
+
+    # A fresh checkout rewrites every mtime but not the content
+    stat = os.stat(snapshot_file)
+    os.utime(snapshot_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 3_600_000_000_000))
+    assert sync_index(source.drill_files(), index_db) == 0
+
+    # The drill queue rewrites the hour's snapshot with another job
+    extra = df.iloc[[0]].assign(**{'Job ID': df['Job ID'].max() + 1, 'Job Title': 'Index Canary'})
+    write_snapshot(normalize_jobs(pd.concat([df, extra])), 'jobs', '20241219_15', str(tmp_path))
+    assert sync_index(source.drill_files(), index_db) == 1
+    assert list(search_jobs({'Job Title': 'Index Canary'}, path=index_db)['Job Title']) == ['Index Canary']
@@ -0,0 +1,17 @@
+import pandas as pd
+from listing_changelog import list_snapshots, materialize, write_snapshot_delta
+
+def listings(*job_ids):
+    return pd.DataFrame({'Job ID': [str(job_id) for job_id in job_ids], 'Job Title': [f"Job {job_id}" for job_id in job_ids]})
+
+def test_full_crawl_replaces_partial_of_the_same_hour(tmp_path):
+    changelog_dir = str(tmp_path)
+    write_snapshot_delta(listings(1, 2, 3), 'Open', '20260101_01', changelog_dir)
+    # An early-stopped crawl only reached posting 1, so 2 and 3 are carried over
+    write_snapshot_delta(listings(1), 'Open', '20260101_05', changelog_dir, partial=True)
+    assert list(materialize('Open', '20260101_05', changelog_dir)['Job ID']) == ['1', '2', '3']
+
+    # A full re-crawl in the same hour finds posting 2 withdrawn
+    write_snapshot_delta(listings(1, 3), 'Open', '20260101_05', changelog_dir)
+    assert [kind for snapshot, kind, _ in list_snapshots('Open', changelog_dir) if snapshot == '20260101_05'] == ['delta']
+    assert list(materialize('Open', '20260101_05', changelog_dir)['Job ID']) == ['1', '3']
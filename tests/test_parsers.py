@@ -0,0 +1,26 @@
+import os
+from glob import glob
+import pandas as pd
+from bench_details import FIXTURES_DIR, parse_job_description_bs4, parse_job_posting_bs4
+from bench_listing import parse_listing_page_bs4
+from parsers import parse_job_description, parse_job_posting, parse_listing_page
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def test_listing_parser_matches_the_beautifulsoup_parser():
+    files = sorted(glob(os.path.join(FIXTURES_DIR, 'listing_*.html')))
+    assert files
+    for path in files:
+        html = read(path)
+        expected = parse_listing_page_bs4(html)
+        pd.testing.assert_frame_equal(pd.DataFrame(parse_listing_page(html)).reindex(columns=expected.columns), expected)
+
+def test_detail_parsers_match_the_beautifulsoup_parsers():
+    previews = sorted(glob(os.path.join(FIXTURES_DIR, 'preview_*.html')))
+    assert previews
+    for preview in previews:
+        posting_html, description_html = read(preview), read(preview.replace('preview_', 'pdr_'))
+        expected = parse_job_description_bs4(description_html, parse_job_posting_bs4(posting_html))
+        assert parse_job_description(description_html, parse_job_posting(posting_html)) == expected
@@ -0,0 +1,36 @@
+import os
+from response_cache import ResponseCache
+
+def test_fresh_entry_is_served_from_disk(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store('https://example.com/a', {}, 'page a')
+    assert cache.cached_text('https://example.com/a') == 'page a'
+    assert cache.cached_text('https://example.com/b') is None
+
+def test_revalidation_only_sends_the_validators_the_server_gave(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    cache.store('https://example.com/a', {}, 'page a')
+    assert cache.cached_text('https://example.com/a') is None
+    assert cache.request_headers('https://example.com/a') == {}
+
+    cache.store('https://example.com/b', {'ETag': '"v1"'}, 'page b')
+    assert cache.request_headers('https://example.com/b') == {'If-None-Match': '"v1"'}
+    assert cache.not_modified('https://example.com/b', {'ETag': '"v2"', 'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT'}) == 'page b'
+    assert cache.request_headers('https://example.com/b') == {'If-None-Match': '"v2"', 'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT'}
+
+def test_missing_body_is_a_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store('https://example.com/a', {'ETag': '"v1"'}, 'page a')
+    os.remove(cache.object_path(cache.index['https://example.com/a']['sha']))
+    assert cache.cached_text('https://example.com/a') is None
+    assert cache.request_headers('https://example.com/a') == {}
+
+def test_save_reloads_and_evicts_unreferenced_bodies(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    cache.store('https://example.com/a', {}, 'a' * 8)
+    cache.store('https://example.com/b', {}, 'b' * 8)
+    cache.index['https://example.com/a']['accessed_at'] -= 60
+    cache.save()
+    reloaded = ResponseCache(str(tmp_path))
+    assert list(reloaded.index) == ['https://example.com/b']
+    assert sum(len(files) for _, _, files in os.walk(os.path.join(str(tmp_path), 'objects'))) == 1
@@ -0,0 +1,15 @@
+import os
+import pandas as pd
+import scraper
+from conftest import SAMPLE_DRILL_FILE
+from stand_in import StandIn
+
+def test_crawl_without_saving_html_in_an_empty_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with StandIn(SAMPLE_DRILL_FILE, pages=2) as server:
+        monkeypatch.setattr(scraper, 'search_url', server.url)
+        listings = scraper.crawl('Open', page_limit=2, listing_mode='http', save_html=False)
+    assert len(listings) == 20
+    assert not os.path.exists(os.path.join('data', 'html'))
+    saved = [name for name in os.listdir('data') if name.startswith('job_listings_')]
+    assert len(saved) == 1 and len(pd.read_csv(os.path.join('data', saved[0]))) == 20